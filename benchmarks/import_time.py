@@ -0,0 +1,99 @@
+# import_time.py
+"""Замер времени импорта точек входа (python -X importtime) с бюджетом.
+
+Запуск из корня проекта:
+    python benchmarks/import_time.py [--repeat 5]
+Код выхода 1, если бюджет превышен или загружены тяжелые библиотеки.
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+MODEL_DIR = PROJECT_ROOT / "burnout-service" / "model"
+
+# Модуль -> (рабочий каталог, бюджет в мс)
+IMPORT_BUDGETS = {
+    'config': (PROJECT_ROOT, 30),
+    'data_manager': (PROJECT_ROOT, 60),
+    'main': (PROJECT_ROOT, 30),
+    'json_predictor': (MODEL_DIR, 60),
+}
+
+# Команда -> (рабочий каталог, бюджет в мс на весь процесс)
+CLI_BUDGETS = {
+    'main.py --help': (PROJECT_ROOT, 150),
+    'json_predictor.py --help': (MODEL_DIR, 150),
+}
+
+HEAVY_MODULES = ('pandas', 'numpy', 'sklearn', 'joblib')
+
+
+def measure_import(module, cwd):
+    """Суммарное время импорта модуля (мкс) и список загруженных пакетов верхнего уровня"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, capture_output=True, text=True, check=True
+    )
+    total_us = None
+    loaded = set()
+    # Строки вида: "import time:       self |  cumulative | package"
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        loaded.add(name.split('.')[0])
+        if name == module:
+            total_us = int(parts[1])
+    return total_us, loaded
+
+
+def measure_cli(command, cwd, repeat):
+    """Лучшее время запуска команды (мс)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + command.split(), cwd=cwd,
+                       capture_output=True, check=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бюджет времени импорта точек входа')
+    parser.add_argument('--repeat', type=int, default=5, help='Число повторов (берется лучшее)')
+    args = parser.parse_args()
+
+    failed = False
+    env_note = f"Python {sys.version.split()[0]}"
+    print(f"⏱️  Время импорта ({env_note})")
+
+    for module, (cwd, budget_ms) in IMPORT_BUDGETS.items():
+        runs = [measure_import(module, cwd) for _ in range(args.repeat)]
+        total_ms = min(total for total, _ in runs) / 1000
+        heavy = sorted(set(HEAVY_MODULES) & runs[0][1])
+        ok = total_ms <= budget_ms and not heavy
+        failed |= not ok
+        status = '✅' if ok else '❌'
+        extra = f", загружены: {', '.join(heavy)}" if heavy else ''
+        print(f"   {status} import {module}: {total_ms:.1f} мс (бюджет {budget_ms} мс{extra})")
+
+    print("⏱️  Запуск CLI")
+    for command, (cwd, budget_ms) in CLI_BUDGETS.items():
+        elapsed = measure_cli(command, cwd, args.repeat)
+        ok = elapsed <= budget_ms
+        failed |= not ok
+        status = '✅' if ok else '❌'
+        print(f"   {status} {command}: {elapsed:.1f} мс (бюджет {budget_ms} мс)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
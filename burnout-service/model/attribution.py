@@ -0,0 +1,127 @@
+# attribution.py
+import numpy as np
+import pandas as pd
+
+from data_loader import DataLoader
+
+
+class FeatureAttributor:
+    """Вклад признаков в вероятность выгорания.
+
+    Методы:
+        shapley   - значения Шепли методом выборки перестановок
+                    (с антитетическими парами) относительно фоновых строк;
+        occlusion - замена каждого признака средним по фону (дешево).
+
+    Все возмущения батча собираются в большие матрицы и оцениваются
+    несколькими вызовами модели; max_rows_per_call ограничивает память.
+    Бюджет точности/стоимости задают n_permutations и n_background.
+    """
+
+    def __init__(self, predictor, background=None, n_background=50, n_permutations=16,
+                 method='shapley', max_rows_per_call=200000, random_state=42):
+        self.predictor = predictor
+        self.n_background = n_background
+        self.n_permutations = n_permutations + n_permutations % 2
+        self.method = method
+        self.max_rows_per_call = max_rows_per_call
+        self.random_state = random_state
+        self._raw_background = background
+        self._cache = None
+
+    def _load_background(self):
+        """Фоновые строки из обучающего набора, в схеме признаков модели"""
+        background = self._raw_background
+        if background is None:
+            splits = DataLoader.load_splits()
+            if splits is None:
+                raise ValueError("Нет фоновых данных для атрибуции")
+            background = splits[0]
+
+        features = self.predictor.expected_features or list(background.columns)
+        background = background.reindex(columns=features, fill_value=0.0).astype(float)
+        if len(background) > self.n_background:
+            background = background.sample(self.n_background, random_state=self.random_state)
+        return background
+
+    def _background(self):
+        """Масштабированный фон; пересчитывается только при смене модели"""
+        scaler, model = self.predictor.scaler, self.predictor.model
+        if self._cache is None or self._cache[0] is not scaler or self._cache[1] is not model:
+            background = self._load_background()
+            scaled = self.predictor._scale(scaler, background)
+            base_value = float(model.predict_proba(scaled)[:, 1].mean())
+            self._cache = (scaler, model, list(background.columns), scaled, base_value)
+        return self._cache[2:]
+
+    def _predict(self, rows):
+        return self.predictor.model.predict_proba(rows)[:, 1]
+
+    def explain(self, processed_data):
+        """Матрица вкладов (сотрудники × признаки) и базовое значение"""
+        columns, background, base_value = self._background()
+        X = self.predictor._scale(self.predictor.scaler, processed_data.reindex(columns=columns))
+
+        if self.method == 'occlusion':
+            contributions = self._occlusion(X, background)
+        else:
+            contributions = self._shapley(X, background)
+
+        return pd.DataFrame(contributions, columns=columns, index=processed_data.index), base_value
+
+    def _occlusion(self, X, background):
+        n, d = X.shape
+        reference = background.mean(axis=0)
+        chunk = max(1, self.max_rows_per_call // (d + 1))
+        contributions = np.empty((n, d))
+        for start in range(0, n, chunk):
+            x = X[start:start + chunk]
+            rows = np.repeat(x[:, None, :], d + 1, axis=1)
+            diagonal = np.arange(d)
+            rows[:, diagonal + 1, diagonal] = reference
+            values = self._predict(rows.reshape(-1, d)).reshape(len(x), d + 1)
+            contributions[start:start + chunk] = values[:, :1] - values[:, 1:]
+        return contributions
+
+    def _shapley(self, X, background):
+        n, d = X.shape
+        m = self.n_permutations
+        rng = np.random.default_rng(self.random_state)
+        chunk = max(1, self.max_rows_per_call // (m * (d + 1)))
+        steps = np.arange(d + 1)[:, None]
+        contributions = np.empty((n, d))
+
+        for start in range(0, n, chunk):
+            x = X[start:start + chunk]
+            c = len(x)
+
+            # Перестановки: вторая половина - обратные к первой (с тем же фоном)
+            half = rng.random((c, m // 2, d)).argsort(axis=2)
+            permutations = np.concatenate([half, half[:, :, ::-1]], axis=1)
+            ranks = permutations.argsort(axis=2)
+            reference_index = rng.integers(len(background), size=(c, m // 2))
+            references = background[np.concatenate([reference_index, reference_index], axis=1)]
+
+            # Шаг k: первые k признаков перестановки взяты от сотрудника
+            mask = ranks[:, :, None, :] < steps
+            rows = np.where(mask, x[:, None, None, :], references[:, :, None, :])
+            values = self._predict(rows.reshape(-1, d)).reshape(c, m, d + 1)
+
+            # Приращение на шаге rank[j] относится к признаку j
+            marginal = np.diff(values, axis=2)
+            contributions[start:start + c] = np.take_along_axis(marginal, ranks, axis=2).mean(axis=1)
+
+        return contributions
+
+    @staticmethod
+    def top_factors(contributions, top=3):
+        """Главные факторы риска для каждой строки"""
+        factors = []
+        values = contributions.to_numpy()
+        order = np.argsort(-np.abs(values), axis=1)[:, :top]
+        for row, indices in enumerate(order):
+            factors.append([
+                {'feature': contributions.columns[j], 'contribution': round(float(values[row, j]), 4)}
+                for j in indices
+            ])
+        return factors
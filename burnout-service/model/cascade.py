@@ -0,0 +1,135 @@
+# cascade.py
+import numpy as np
+from scipy.stats import beta
+from sklearn.linear_model import LogisticRegression
+
+
+class ScreenCascade:
+    """Двухуровневая оценка: дешевая линейная модель-скрининг, затем SVM.
+
+    Скрининг оценивает всех; записи с вероятностью ниже low сразу получают
+    класс 0, выше high - класс 1, и только попавшие в полосу неопределенности
+    [low, high] идут в SVM. Полоса всегда содержит 0.5, поэтому без SVM
+    остаются только записи, в классе которых уверен сам скрининг. Границы
+    подбираются по прогнозам вне фолдов (каждая запись оценена моделями,
+    не видевшими ее) так, чтобы верхняя доверительная граница доли
+    расхождений с прогнозом одной SVM не превышала заданную; если выборка
+    для этого мала, полоса пуста и все записи идут в SVM.
+    """
+
+    def __init__(self, screen, low=0.0, high=1.0, calibration=None):
+        self.screen = screen
+        self.low = low
+        self.high = high
+        self.calibration = calibration or {}
+
+    @staticmethod
+    def fit_screen(X_scaled, y, random_state=42):
+        """Модель-скрининг на тех же масштабированных признаках, что и SVM"""
+        return LogisticRegression(max_iter=1000, random_state=random_state).fit(X_scaled, y)
+
+    @staticmethod
+    def disagreement_bound(disagreements, n, confidence=0.95):
+        """Верхняя граница Клоппера-Пирсона для доли расхождений"""
+        if disagreements >= n:
+            return 1.0
+        return float(beta.ppf(confidence, disagreements + 1, n - disagreements))
+
+    @property
+    def empty(self):
+        """Полоса покрывает все вероятности - скрининг ничего не отсекает"""
+        return self.low <= 0.0 and self.high >= 1.0
+
+    @classmethod
+    def calibrate(cls, screen, probability, svm_prediction, target_disagreement=0.01, confidence=0.95):
+        """Самая широкая отсечка, для которой верхняя доверительная граница
+        доли расхождений с SVM не выше target_disagreement.
+
+        probability - вероятность класса 1 у скрининга и svm_prediction -
+        прогноз SVM для одних и тех же записей, не участвовавших в обучении
+        этих моделей.
+
+        Кандидаты границ - середины между соседними значениями вероятности
+        скрининга; для каждой нижней границы (не выше 0.5) берется
+        наименьшая верхняя (не ниже 0.5), укладывающаяся в допустимое
+        число расхождений. Если даже ноль расхождений не дает нужной
+        границы (мала выборка), полоса пуста.
+        """
+        probability = np.asarray(probability, dtype=float)
+        svm_prediction = np.asarray(svm_prediction).astype(int)
+        n = len(probability)
+        order = np.argsort(probability, kind='stable')
+        p = probability[order]
+        positive = np.concatenate([[0], np.cumsum(svm_prediction[order])])
+
+        values = np.unique(p)
+        cuts = np.concatenate([[0.0], (values[:-1] + values[1:]) / 2, [1.0]])
+        n_low = np.searchsorted(p, cuts, side='left')
+        n_high = n - np.searchsorted(p, cuts, side='right')
+        # Расхождения: ниже low SVM дала 1, выше high SVM дала 0
+        disagree_low = positive[n_low]
+        disagree_high = n_high - (positive[n] - positive[n - n_high])
+
+        # Наибольшее число расхождений, при котором граница еще допустима
+        budget = -1
+        while budget + 1 < n and cls.disagreement_bound(budget + 1, n, confidence) <= target_disagreement:
+            budget += 1
+
+        best = (0, 0, 0, len(cuts) - 1)
+        first_high = int(np.searchsorted(cuts, 0.5, side='left'))
+        for i in range(int(np.searchsorted(cuts, 0.5, side='right')) if budget >= 0 else 0):
+            remaining = budget - disagree_low[i]
+            if remaining < 0:
+                break
+            # disagree_high не возрастает: берем первую допустимую верхнюю границу
+            j = max(first_high, int(np.searchsorted(-disagree_high, -remaining, side='left')))
+            if j >= len(cuts):
+                continue
+            candidate = (n_low[i] + n_high[j], -(disagree_low[i] + disagree_high[j]), i, j)
+            if candidate[:2] > best[:2]:
+                best = candidate
+
+        short_circuited, disagreements, i, j = best
+        calibration = {
+            'target_disagreement': target_disagreement,
+            'confidence': confidence,
+            'n_calibration': int(n),
+            'sufficient_sample': budget >= 0,
+            'disagreement': float(-disagreements / n) if n else 0.0,
+            'disagreement_upper_bound': cls.disagreement_bound(int(-disagreements), n, confidence) if n else 1.0,
+            'short_circuit_rate': float(short_circuited / n) if n else 0.0
+        }
+        return cls(screen, float(cuts[i]), float(cuts[j]), calibration)
+
+    def predict(self, model, scaled_data):
+        """Результат как у predict_batch и число записей, оцененных без SVM.
+
+        probability_source - чья вероятность в строке: 'screen' (отсечено
+        скринингом) или 'svm'.
+        """
+        probability = self.screen.predict_proba(scaled_data)
+        prediction = (probability[:, 1] > self.high).astype(int)
+        uncertain = (probability[:, 1] >= self.low) & (probability[:, 1] <= self.high)
+
+        if uncertain.any():
+            rows = np.flatnonzero(uncertain)
+            svm_prediction = model.predict(scaled_data[rows])
+            prediction = prediction.astype(np.asarray(svm_prediction).dtype)
+            prediction[rows] = svm_prediction
+            probability[rows] = model.predict_proba(scaled_data[rows])
+
+        return {
+            'prediction': prediction,
+            'burnout_probability': probability[:, 1],
+            'no_burnout_probability': probability[:, 0],
+            'confidence': probability.max(axis=1),
+            'probability_source': np.where(uncertain, 'svm', 'screen')
+        }, int(len(probability) - uncertain.sum())
+
+    def to_dict(self):
+        return {'screen': self.screen, 'low': self.low, 'high': self.high,
+                'calibration': self.calibration}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['screen'], data['low'], data['high'], data.get('calibration'))
@@ -0,0 +1,109 @@
+# checkpoint.py
+import json
+import os
+import shutil
+from datetime import datetime
+
+from model_registry import file_checksum
+
+STATE_NAME = 'state.json'
+
+
+def _write_atomic(path, write):
+    """Запись через временный файл с fsync и атомарной заменой"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ScoringCheckpoint:
+    """Контрольные точки пакетного прогноза.
+
+    Результаты фиксируются порциями (chunk_NNNNNN.jsonl), затем
+    атомарно обновляется state.json: число обработанных записей входа,
+    список порций и состояние агрегатов. Порция, записанная без
+    обновления state.json, при возобновлении перезаписывается.
+    """
+
+    def __init__(self, directory, commit_every=8):
+        self.directory = directory
+        self.commit_every = commit_every
+        self.state = None
+
+    @property
+    def state_path(self):
+        return os.path.join(self.directory, STATE_NAME)
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def begin(self, json_path, run_key):
+        """Открытие прогона: возобновление, если вход и параметры совпадают.
+
+        run_key - версия модели и параметры, влияющие на результат.
+        Возвращает сохраненное состояние (None для нового прогона).
+        """
+        fingerprint = {
+            'input': os.path.abspath(json_path),
+            'input_sha256': file_checksum(json_path),
+            'run_key': run_key
+        }
+        state = self._load_state()
+        if state is not None and state['fingerprint'] != fingerprint:
+            print(f"⚠️  Контрольная точка {self.directory} относится к другому входу или модели, начинаем заново")
+            shutil.rmtree(self.directory, ignore_errors=True)
+            state = None
+
+        if state is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.state = {
+                'fingerprint': fingerprint,
+                'created': datetime.now().isoformat(),
+                'processed': 0,
+                'chunks': [],
+                'complete': False,
+                'aggregates': {}
+            }
+            return None
+
+        self.state = state
+        print(f"↪️  Возобновление с записи {state['processed'] + 1} "
+              f"({len(state['chunks'])} порций уже зафиксировано)")
+        return state
+
+    @property
+    def processed(self):
+        return self.state['processed'] if self.state else 0
+
+    def commit(self, results, processed, aggregates, complete=False):
+        """Фиксация порции результатов и позиции во входе"""
+        chunk_name = f"chunk_{len(self.state['chunks']) + 1:06d}.jsonl"
+        if results:
+            def write_chunk(f):
+                for result in results:
+                    f.write(json.dumps(result, ensure_ascii=False) + '\n')
+            _write_atomic(os.path.join(self.directory, chunk_name), write_chunk)
+            self.state['chunks'].append({'file': chunk_name, 'rows': len(results)})
+
+        self.state.update(
+            processed=processed,
+            aggregates=aggregates,
+            complete=complete,
+            updated=datetime.now().isoformat()
+        )
+        _write_atomic(self.state_path,
+                      lambda f: json.dump(self.state, f, ensure_ascii=False, indent=2))
+
+    def iter_results(self):
+        """Зафиксированные результаты в порядке входа"""
+        for chunk in self.state['chunks']:
+            with open(os.path.join(self.directory, chunk['file']), 'r', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
@@ -0,0 +1,182 @@
+# drift_monitor.py
+import json
+
+import numpy as np
+
+# Пороги PSI: < 0.1 - стабильно, 0.1-0.25 - умеренный, > 0.25 - значительный дрейф
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+_EPSILON = 1e-4
+
+
+class ReferenceProfile:
+    """Компактные эталонные гистограммы признаков обучающего набора"""
+
+    def __init__(self, features, edges, counts):
+        self.features = list(features)
+        self.edges = [np.asarray(e, dtype=float) for e in edges]
+        self.counts = [np.asarray(c, dtype=np.int64) for c in counts]
+
+    @classmethod
+    def build(cls, X, bins=10):
+        """Границы корзин - квантили; для дискретных признаков - между значениями"""
+        values = np.asarray(X, dtype=float)
+        edges = []
+        for column in values.T:
+            unique = np.unique(column[~np.isnan(column)])
+            if len(unique) <= bins:
+                cut_points = (unique[:-1] + unique[1:]) / 2
+            else:
+                cut_points = np.unique(np.nanquantile(column, np.linspace(0, 1, bins + 1)[1:-1]))
+            edges.append(cut_points)
+        profile = cls(list(X.columns), edges, [np.zeros(len(e) + 1, dtype=np.int64) for e in edges])
+        return profile.add(values)
+
+    def add(self, X):
+        """Досчет эталонных частот по порции данных (границы не меняются)"""
+        values = np.asarray(X, dtype=float)
+        for j, counts in enumerate(self.histograms(values)):
+            self.counts[j] += counts
+        return self
+
+    def histograms(self, values):
+        """Частоты по корзинам для каждого признака"""
+        return [
+            np.bincount(np.searchsorted(edges, values[:, j], side='right'), minlength=len(edges) + 1)
+            for j, edges in enumerate(self.edges)
+        ]
+
+    def aligned(self, features):
+        """Профиль в порядке признаков модели (неизвестные признаки пропускаются)"""
+        index = {name: j for j, name in enumerate(self.features)}
+        present = [name for name in features if name in index]
+        return ReferenceProfile(
+            present,
+            [self.edges[index[name]] for name in present],
+            [self.counts[index[name]] for name in present]
+        )
+
+    def to_dict(self):
+        return {
+            'features': self.features,
+            'edges': [e.tolist() for e in self.edges],
+            'counts': [c.tolist() for c in self.counts]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['features'], data['edges'], data['counts'])
+
+
+def _proportions(counts):
+    counts = np.asarray(counts, dtype=float)
+    return np.clip(counts / max(counts.sum(), 1.0), _EPSILON, None)
+
+
+def psi(reference_counts, current_counts):
+    """Population Stability Index по корзинам"""
+    expected = _proportions(reference_counts)
+    actual = _proportions(current_counts)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks(reference_counts, current_counts):
+    """Статистика Колмогорова-Смирнова по кумулятивным частотам корзин"""
+    expected = np.cumsum(reference_counts) / max(np.sum(reference_counts), 1)
+    actual = np.cumsum(current_counts) / max(np.sum(current_counts), 1)
+    return float(np.max(np.abs(actual - expected)))
+
+
+class DriftMonitor:
+    """Мониторинг дрейфа входных признаков относительно обучающего набора.
+
+    В гистограммы попадает случайная доля строк (sample_rate), поэтому
+    стоимость на горячем пути - один searchsorted по выборке батча.
+    """
+
+    def __init__(self, reference, features, sample_rate=0.1, random_state=42):
+        self.reference = reference.aligned(features)
+        positions = {name: j for j, name in enumerate(features)}
+        self.columns = np.array([positions[name] for name in self.reference.features], dtype=int)
+        self.sample_rate = sample_rate
+        self.rng = np.random.default_rng(random_state)
+        self.run_counts = [np.zeros_like(c) for c in self.reference.counts]
+        self.rows_seen = 0
+        self.rows_sampled = 0
+        self.batches = []
+
+    def update(self, features):
+        """Учет батча матрицы признаков (в порядке признаков модели)"""
+        values = np.asarray(features, dtype=float)
+        self.rows_seen += len(values)
+        if self.sample_rate < 1.0:
+            values = values[self.rng.random(len(values)) < self.sample_rate]
+        if len(values) == 0:
+            return None
+
+        batch_counts = self.reference.histograms(values[:, self.columns])
+        scores = []
+        for j, counts in enumerate(batch_counts):
+            self.run_counts[j] += counts
+            scores.append(psi(self.reference.counts[j], counts))
+
+        self.rows_sampled += len(values)
+        worst = int(np.argmax(scores))
+        batch = {
+            'rows': len(values),
+            'max_psi': scores[worst],
+            'max_psi_feature': self.reference.features[worst]
+        }
+        self.batches.append(batch)
+        return batch
+
+    def get_state(self):
+        """Накопленное состояние прогона (для контрольных точек)"""
+        return {
+            'run_counts': [c.tolist() for c in self.run_counts],
+            'rows_seen': self.rows_seen,
+            'rows_sampled': self.rows_sampled,
+            'batches': self.batches,
+            'rng': self.rng.bit_generator.state
+        }
+
+    def set_state(self, state):
+        self.run_counts = [np.asarray(c, dtype=np.int64) for c in state['run_counts']]
+        self.rows_seen = state['rows_seen']
+        self.rows_sampled = state['rows_sampled']
+        self.batches = list(state['batches'])
+        self.rng.bit_generator.state = state['rng']
+        return self
+
+    def report(self, default_counts=None):
+        """Отчет о дрейфе за прогон"""
+        features = {}
+        for j, name in enumerate(self.reference.features):
+            score = psi(self.reference.counts[j], self.run_counts[j])
+            features[name] = {
+                'psi': round(score, 4),
+                'ks': round(ks(self.reference.counts[j], self.run_counts[j]), 4),
+                'level': 'значительный' if score > PSI_SIGNIFICANT
+                else 'умеренный' if score > PSI_MODERATE else 'стабильно'
+            }
+
+        return {
+            'rows_seen': self.rows_seen,
+            'rows_sampled': self.rows_sampled,
+            'sample_rate': self.sample_rate,
+            'features': features,
+            'drifted': sorted(
+                (name for name, stats in features.items() if stats['level'] != 'стабильно'),
+                key=lambda name: -features[name]['psi']
+            ),
+            'batches': self.batches,
+            'defaults_substituted': dict(default_counts or {})
+        }
+
+    def save_report(self, path, default_counts=None):
+        report = self.report(default_counts)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Отчет о дрейфе сохранен в {path}")
+        return report
@@ -1,45 +1,267 @@
-import pandas as pd
-import numpy as np
 import json
-import joblib
-from sklearn.preprocessing import LabelEncoder
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+
+# Пробелы и запятые между элементами JSON-массива
+_ARRAY_SEPARATORS = re.compile(r'[\s,]*')
+
+# Тяжелые зависимости (pandas, sklearn, joblib) загружаются при первом
+# создании предсказателя, чтобы --help и ошибки аргументов отвечали сразу
+pd = np = joblib = None
+
+def _load_dependencies():
+    """Импорт тяжелых библиотек и модулей модели по требованию"""
+    global pd, np, joblib, LabelEncoder, StandardScaler, FeatureAttributor, DriftMonitor
+    global ReferenceProfile, RiskAggregator, ModelRegistry, RegistryWatcher
+    global resolve_feature_names, file_checksum, ValueCache, AgreementStats, TopRisk
+    global ScoringCheckpoint, ScreenCascade, KPIHistory, kpi_columns, window_suffix, KPI_WINDOWS
+    if pd is not None:
+        return
+    import pandas as pd
+    import numpy as np
+    import joblib
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from attribution import FeatureAttributor
+    from drift_monitor import DriftMonitor, ReferenceProfile
+    from risk_aggregator import RiskAggregator
+    from model_comparison import AgreementStats
+    from top_risk import TopRisk
+    from checkpoint import ScoringCheckpoint
+    from cascade import ScreenCascade
+    from model_registry import ModelRegistry, RegistryWatcher, file_checksum, resolve_feature_names
+    
+    # Общий с DataProcessor слой разбора значений лежит в корне проекта
+    project_root = str(Path(__file__).resolve().parents[2])
+    if project_root not in sys.path:
+        sys.path.append(project_root)
+    from value_cache import ValueCache
+    from kpi_history import KPIHistory, kpi_columns, window_suffix
+    from config import KPI_WINDOWS
 
 class JSONPredictor:
-    def __init__(self, model_path='svm_model.pkl'):
+    KPI_MONTHS = ['июнь', 'июль', 'август', 'сентябрь', 'октябрь']
+    
+    BINARY_MAPPING = {
+        'да': 1, 'нет': 0, 'yes': 1, 'no': 0,
+        'прошел': 1, 'не прошел': 0, 'нет аттестации': 0,
+        'завершена': 1, 'в процессе': 0,
+        'Руководитель': 1, 'Сотрудник': 0, 'Сотрутник': 0
+    }
+    
+    CITIES = ['Москва', 'Санкт-Петербург', 'Новосибирск', 'Самара', 'Красноярск', 
+              'Казань', 'Омск', 'Екатеринбург', 'Кемерово']
+    
+    POSITIONS = [
+        'Менеджер по работе с клиентами', 'Старший менеджер по работе с клиентами',
+        'Курьер', 'Кладовщик', 'Бригадир', 'Юрист', 'Бухгалтер', 'Кассир',
+        'Логист', 'Менеджер по территориальному развити.', 'Разработчик бэкенд',
+        'Дизайнер', 'Тестировщик', 'Разработчик фронт', 'Руководитель проекта',
+        'Руководитель отдела продаж', 'Руководитель клиентсокго отдела',
+        'Главный бухгалтер', 'Руководитель склада', 'Руководитель контактного-центра 1 линии',
+        'Директор филиала', 'Менеджер по продажам'
+    ]
+    
+    # Параметры сценариев "что если" -> признаки модели
+    SCENARIO_FEATURES = {
+        'vacation_months': 'Отпуск_месяцев_назад',
+        'training': 'Обучение',
+        'manager': 'Руководитель',
+        'sick_leave': 'Больничный',
+        'reprimand': 'Выговор',
+        'attestation': 'Прохождение аттестации',
+        'activities': 'Участие в активностях',
+        'experience_months': 'Стаж_месяцы',
+        'age': 'возраст'
+    }
+    
+    def __init__(self, model_path='svm_model.pkl', registry_dir=None):
         """Инициализация предсказателя для JSON данных"""
+        _load_dependencies()
+        
+        self.model = None
+        self.scaler = None
+        self.scaler_key = None
+        self.metrics = {}
+        self.expected_features = None
+        self.model_version = None
+        self.drift_reference = None
+        
+        # Каскадная оценка: модель-скрининг из артефакта, включается use_cascade
+        self.cascade = None
+        self.use_cascade = False
+        self.cascade_counts = Counter()
+        
+        # Состояние горячей замены модели
+        self.registry = ModelRegistry(registry_dir) if registry_dir else None
+        self._previous_bundle = None
+        self._pending_bundle = None
+        self._swap_lock = threading.Lock()
+        self._watcher = None
+        
+        # Модели-претенденты, оцениваемые на тех же батчах
+        self.challengers = []
+        
         try:
-            model_data = joblib.load(model_path)
-            self.model = model_data['model']
-            self.scaler = model_data['scaler']
-            self.metrics = model_data.get('metrics', {})
-            print(f"✅ Модель загружена из {model_path}")
-            
-            # Загружаем ожидаемые признаки из обучающих данных
-            self.expected_features = self._get_expected_features()
+            if self.registry:
+                bundle = self.registry.load()
+                print(f"✅ Модель {bundle['version']} загружена из реестра {registry_dir}")
+            else:
+                bundle = self._load_bundle_file(model_path)
+                print(f"✅ Модель загружена из {model_path}")
+            self._install_bundle(bundle)
             
-        except FileNotFoundError:
-            print(f"❌ Модель {model_path} не найдена")
-            self.model = None
-            self.scaler = None
-            self.expected_features = None
+        except (FileNotFoundError, KeyError) as e:
+            print(f"❌ Модель {registry_dir or model_path} не найдена: {e}")
+        except ValueError as e:
+            # Несовпадение контрольной суммы или непригодный артефакт
+            print(f"❌ Модель {registry_dir or model_path} не загружена: {e}")
         
         # Инициализируем кодировщики для категориальных признаков
         self.label_encoders = {}
+        
+        # Атрибуция признаков (создается при первом запросе объяснений)
+        self.attributor = None
+        
+        # Сколько раз подставлялись значения по умолчанию (для отчета о дрейфе)
+        self.default_counts = Counter()
+        
+        # Разбор повторяющихся строк (стаж, даты отпуска) - один раз на значение
+        self._experience_cache = ValueCache(self._experience_to_months)
+        self._vacation_cache = ValueCache(self._vacation_months_ago)
     
-    def _get_expected_features(self):
-        """Получаем ожидаемые признаки из обучающих данных"""
-        try:
-            # Пытаемся загрузить обучающие данные чтобы узнать ожидаемые признаки
-            from data_loader import DataLoader
-            splits = DataLoader.load_splits()
-            if splits:
-                X_train, _, _, _, _, _ = splits
-                return list(X_train.columns)
-        except:
-            pass
+    @staticmethod
+    def _load_bundle_file(model_path):
+        """Артефакт модели из файла в формате реестра"""
+        model_data = joblib.load(model_path)
+        return {
+            'version': f"file:{file_checksum(model_path)[:12]}",
+            'model': model_data['model'],
+            'scaler': model_data['scaler'],
+            'metrics': model_data.get('metrics', {}),
+            'feature_names': resolve_feature_names(model_data),
+            'drift_reference': model_data.get('drift_reference'),
+            'cascade': model_data.get('cascade')
+        }
+    
+    @staticmethod
+    def _scaler_key(scaler, features):
+        """Ключ совпадения масштабирования: одинаковые scaler и схема дают одну матрицу"""
+        if not isinstance(scaler, StandardScaler):
+            return ('object', id(scaler))
+        return (
+            tuple(features or ()), scaler.with_mean, scaler.with_std,
+            np.asarray(scaler.mean_).tobytes() if scaler.with_mean else None,
+            np.asarray(scaler.scale_).tobytes() if scaler.with_std else None
+        )
+    
+    def _install_bundle(self, bundle):
+        """Установка модели, scaler и схемы признаков одним шагом"""
+        # Схема признаков определяется при загрузке файла или регистрации
+        # версии в реестре; здесь (в том числе между батчами) данные не читаются
+        if not bundle.get('feature_names'):
+            raise ValueError(f"У модели {bundle['version']} нет схемы признаков")
         
-        # Если не удалось загрузить, возвращаем None
-        return None
+        if self.model is not None:
+            self._previous_bundle = self._current_bundle()
+        
+        self.model = bundle['model']
+        self.scaler = bundle['scaler']
+        self.metrics = bundle.get('metrics', {})
+        self.expected_features = list(bundle['feature_names'])
+        self.model_version = bundle['version']
+        self.drift_reference = bundle.get('drift_reference')
+        self.scaler_key = self._scaler_key(self.scaler, self.expected_features)
+        self.cascade = ScreenCascade.from_dict(bundle['cascade']) if bundle.get('cascade') else None
+    
+    def _current_bundle(self):
+        return {
+            'version': self.model_version,
+            'model': self.model,
+            'scaler': self.scaler,
+            'metrics': self.metrics,
+            'feature_names': self.expected_features,
+            'drift_reference': self.drift_reference,
+            'cascade': self.cascade.to_dict() if self.cascade is not None else None
+        }
+    
+    def watch_registry(self, interval=5.0):
+        """Запуск фонового наблюдения за реестром моделей"""
+        if self.registry is None:
+            print("❌ Реестр моделей не задан")
+            return None
+        
+        def on_ready(bundle):
+            with self._swap_lock:
+                self._pending_bundle = bundle
+            print(f"🔄 Модель {bundle['version']} подготовлена к замене")
+        
+        self._watcher = RegistryWatcher(
+            self.registry,
+            get_active_version=lambda: (self._pending_bundle or {}).get('version', self.model_version),
+            on_ready=on_ready,
+            interval=interval
+        )
+        self._watcher.start()
+        return self._watcher
+    
+    def add_challenger(self, source):
+        """Модель-претендент: путь к артефакту или версия из реестра"""
+        if self.registry is not None and not os.path.exists(source):
+            bundle = self.registry.load(source)
+        else:
+            bundle = self._load_bundle_file(source)
+        
+        features = list(bundle.get('feature_names') or self.expected_features or [])
+        missing = [name for name in features if self.expected_features and name not in self.expected_features]
+        if missing:
+            print(f"⚠️  Признаки претендента вне схемы чемпиона будут равны 0: {', '.join(missing[:5])}")
+        
+        name = bundle['version']
+        taken = {self.model_version, *(challenger['name'] for challenger in self.challengers)}
+        suffix = 2
+        while name in taken:
+            name = f"{bundle['version']}#{suffix}"
+            suffix += 1
+        
+        self.challengers.append(dict(
+            bundle, name=name, feature_names=features,
+            scaler_key=self._scaler_key(bundle['scaler'], features)
+        ))
+        print(f"✅ Модель-претендент {name} загружена из {source}")
+        return name
+    
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+    
+    def swap_pending_model(self):
+        """Замена модели на подготовленную (вызывается между батчами)"""
+        with self._swap_lock:
+            bundle, self._pending_bundle = self._pending_bundle, None
+        if bundle is None or bundle['version'] == self.model_version:
+            return False
+        self._install_bundle(bundle)
+        print(f"🔁 Активна модель {self.model_version}")
+        return True
+    
+    def rollback_model(self):
+        """Мгновенный откат на предыдущую загруженную модель"""
+        if self._previous_bundle is None:
+            print("❌ Нет предыдущей модели для отката")
+            return False
+        with self._swap_lock:
+            self._pending_bundle = None
+        self._install_bundle(self._previous_bundle)
+        if self.registry and self.registry.current_version() != self.model_version:
+            self.registry.promote(self.model_version)
+        print(f"↩️  Активна модель {self.model_version}")
+        return True
     
     def load_json_data(self, json_path):
         """Загрузка данных из JSON файла"""
@@ -55,6 +277,59 @@ class JSONPredictor:
             print(f"❌ Ошибка декодирования JSON файла {json_path}")
             return None
     
+    def iter_json_employees(self, json_path, read_size=1 << 20):
+        """Потоковое чтение сотрудников из JSON файла.
+        
+        Массив верхнего уровня читается блоками и разбирается по одному
+        элементу (память - блок и текущая запись). Объект верхнего уровня
+        ({"employees": [...]} или один сотрудник) загружается целиком.
+        """
+        decoder = json.JSONDecoder()
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                buffer = f.read(read_size)
+                position = _ARRAY_SEPARATORS.match(buffer).end()
+                is_array = buffer[position:position + 1] == '['
+                
+                if is_array:
+                    position += 1
+                    eof = False
+                    while True:
+                        position = _ARRAY_SEPARATORS.match(buffer, position).end()
+                        if position < len(buffer) and buffer[position] == ']':
+                            return
+                        try:
+                            if position >= len(buffer):
+                                raise json.JSONDecodeError("Незавершенный массив", buffer, position)
+                            employee, position = decoder.raw_decode(buffer, position)
+                        except json.JSONDecodeError:
+                            # Запись не поместилась в блок - дочитываем
+                            if eof:
+                                raise
+                            chunk = f.read(read_size)
+                            eof = not chunk
+                            buffer = buffer[position:] + chunk
+                            position = 0
+                            continue
+                        yield employee
+        except FileNotFoundError:
+            print(f"❌ JSON файл {json_path} не найден")
+            return
+        except json.JSONDecodeError:
+            print(f"❌ Ошибка декодирования JSON файла {json_path}")
+            return
+        
+        data = self.load_json_data(json_path)
+        if data is None:
+            return
+        
+        # Проверяем структуру JSON
+        if isinstance(data, dict):
+            # Один сотрудник или объект с данными
+            yield from data['employees'] if 'employees' in data else [data]
+        else:
+            print("❌ Неподдерживаемый формат JSON")
+    
     def transform_to_model_features(self, employee_data):
         """Преобразование сырых данных в формат модели"""
         # Создаем копию данных
@@ -68,69 +343,41 @@ class JSONPredictor:
             processed_data['возраст'] = float(data['возраст'])
         else:
             processed_data['возраст'] = 30.0  # значение по умолчанию
+            self.default_counts['возраст'] += 1
         
         # 2. Преобразование стажа в месяцы
         if 'Стаж' in data:
-            processed_data['Стаж_месяцы'] = float(self._experience_to_months(data['Стаж']))
+            processed_data['Стаж_месяцы'] = float(self._experience_cache(data['Стаж']))
         else:
             processed_data['Стаж_месяцы'] = 24.0  # 2 года по умолчанию
+            self.default_counts['Стаж'] += 1
         
-        # 3. KPI показатели
-        kpi_months = ['июнь', 'июль', 'август', 'сентябрь', 'октябрь']
-        kpi_values = []
-        
-        for month in kpi_months:
-            if month in data:
-                kpi_value = data[month]
-                # Преобразуем в число если нужно
-                if isinstance(kpi_value, str):
-                    try:
-                        kpi_value = float(kpi_value) if kpi_value.replace('.', '').replace(',', '').isdigit() else 0.8
-                    except:
-                        kpi_value = 0.8
-                processed_data[f'KPI_{month}'] = float(kpi_value)
-                kpi_values.append(float(kpi_value))
-            else:
-                processed_data[f'KPI_{month}'] = 0.8  # среднее значение по умолчанию
-                kpi_values.append(0.8)
+        # 3. KPI показатели: месячный ряд записи; базовые месяцы модели,
+        # которых в записи нет, получают значение по умолчанию
+        kpi_months, kpi_values = self._kpi_values(data)
+        for month, kpi_value in zip(kpi_months, kpi_values):
+            processed_data[f'KPI_{month}'] = kpi_value
+        for month in self.KPI_MONTHS:
+            if month not in data:
+                processed_data.setdefault(f'KPI_{month}', 0.8)
+                self.default_counts[month] += 1
         
         # 4. Статистики по KPI
         if kpi_values:
-            kpi_array = np.array(kpi_values)
-            processed_data['KPI_заполнено_показателей'] = float(len([x for x in kpi_values if x > 0]))
-            processed_data['KPI_стабильность'] = float(kpi_array.std() if len(kpi_values) > 1 else 0.1)
-            processed_data['KPI_мин'] = float(kpi_array.min())
-            processed_data['KPI_макс'] = float(kpi_array.max())
-            processed_data['KPI_размах'] = float(kpi_array.max() - kpi_array.min() if len(kpi_values) > 0 else 0.2)
-            
-            # Расчет тренда KPI
-            if len(kpi_values) >= 2:
-                x = np.arange(len(kpi_values))
-                try:
-                    trend = np.polyfit(x, kpi_values, 1)[0]
-                    processed_data['KPI_тренд'] = float(trend)
-                except:
-                    processed_data['KPI_тренд'] = 0.0
-            else:
-                processed_data['KPI_тренд'] = 0.0
-            
-            # Последний KPI
-            processed_data['KPI_последний'] = float(kpi_values[-1] if kpi_values else 0.8)
+            kpi_stats = self._kpi_statistics(np.array([kpi_values]))
+            for feature, values in kpi_stats.items():
+                processed_data[feature] = float(values[0])
         
         # 5. Обработка отпуска
         if 'Отпуск (когда ходил в последний раз)' in data:
             vacation_date = data['Отпуск (когда ходил в последний раз)']
-            processed_data['Отпуск_месяцев_назад'] = float(self._vacation_months_ago(vacation_date))
+            processed_data['Отпуск_месяцев_назад'] = float(self._vacation_cache(vacation_date))
         else:
             processed_data['Отпуск_месяцев_назад'] = 6.0  # 6 месяцев по умолчанию
+            self.default_counts['Отпуск'] += 1
         
         # 6. Бинарные признаки
-        binary_mapping = {
-            'да': 1, 'нет': 0, 'yes': 1, 'no': 0,
-            'прошел': 1, 'не прошел': 0, 'нет аттестации': 0,
-            'завершена': 1, 'в процессе': 0,
-            'Руководитель': 1, 'Сотрудник': 0, 'Сотрутник': 0
-        }
+        binary_mapping = self.BINARY_MAPPING
         
         # Больничный
         if 'Больничный (брал или нет в 2025 году)' in data:
@@ -138,6 +385,7 @@ class JSONPredictor:
             processed_data['Больничный'] = float(binary_mapping.get(sick_key, 0))
         else:
             processed_data['Больничный'] = 0.0
+            self.default_counts['Больничный'] += 1
         
         # Выговор
         if 'Выговор (да/нет)' in data:
@@ -145,6 +393,7 @@ class JSONPredictor:
             processed_data['Выговор'] = float(binary_mapping.get(reprimand_key, 0))
         else:
             processed_data['Выговор'] = 0.0
+            self.default_counts['Выговор'] += 1
         
         # Аттестация
         if 'Прохождение аттестации (прошел/не прошел/нет аттестации)' in data:
@@ -152,6 +401,7 @@ class JSONPredictor:
             processed_data['Прохождение аттестации'] = float(binary_mapping.get(attestation_key, 0))
         else:
             processed_data['Прохождение аттестации'] = 1.0  # по умолчанию прошел
+            self.default_counts['Прохождение аттестации'] += 1
         
         # Участие в активностях
         if 'Участие в активностях корпоративных' in data:
@@ -159,6 +409,7 @@ class JSONPredictor:
             processed_data['Участие в активностях'] = float(binary_mapping.get(activities_key, 0))
         else:
             processed_data['Участие в активностях'] = 1.0  # по умолчанию участвует
+            self.default_counts['Участие в активностях'] += 1
         
         # Обучение
         if 'Обучение' in data:
@@ -166,55 +417,43 @@ class JSONPredictor:
             processed_data['Обучение'] = float(binary_mapping.get(training_key, 0))
         else:
             processed_data['Обучение'] = 1.0  # по умолчанию завершено
+            self.default_counts['Обучение'] += 1
         
         # Руководитель
-        if 'В подчиненнии сотрудники' in data:
-            manager_key = data['В подчиненнии сотрудники']
-            processed_data['Руководитель'] = float(binary_mapping.get(manager_key, 0))
-        else:
-            processed_data['Руководитель'] = 0.0  # по умолчанию сотрудник
+        processed_data['Руководитель'] = self._manager_flag(data)
+        if 'В подчиненнии сотрудники' not in data:
+            self.default_counts['Руководитель'] += 1
         
         # 7. One-Hot Encoding для города и должности
-        cities = ['Москва', 'Санкт-Петербург', 'Новосибирск', 'Самара', 'Красноярск', 
-                 'Казань', 'Омск', 'Екатеринбург', 'Кемерово']
-        for city_name in cities:
+        for city_name in self.CITIES:
             processed_data[f'Город_{city_name}'] = 0.0
         
         if 'Город' in data:
             city = data['Город']
-            for city_name in cities:
-                if city == city_name:
-                    processed_data[f'Город_{city_name}'] = 1.0
-                    break
+            if city in self.CITIES:
+                processed_data[f'Город_{city}'] = 1.0
             else:
                 # Если город не найден, ставим Москву по умолчанию
                 processed_data['Город_Москва'] = 1.0
+                self.default_counts['Город (неизвестный)'] += 1
         else:
             processed_data['Город_Москва'] = 1.0
+            self.default_counts['Город'] += 1
         
-        positions = [
-            'Менеджер по работе с клиентами', 'Старший менеджер по работе с клиентами',
-            'Курьер', 'Кладовщик', 'Бригадир', 'Юрист', 'Бухгалтер', 'Кассир',
-            'Логист', 'Менеджер по территориальному развити.', 'Разработчик бэкенд',
-            'Дизайнер', 'Тестировщик', 'Разработчик фронт', 'Руководитель проекта',
-            'Руководитель отдела продаж', 'Руководитель клиентсокго отдела',
-            'Главный бухгалтер', 'Руководитель склада', 'Руководитель контактного-центра 1 линии',
-            'Директор филиала', 'Менеджер по продажам'
-        ]
-        for pos_name in positions:
+        for pos_name in self.POSITIONS:
             processed_data[f'Должность_{pos_name}'] = 0.0
         
         if 'Должность' in data:
             position = data['Должность']
-            for pos_name in positions:
-                if position == pos_name:
-                    processed_data[f'Должность_{pos_name}'] = 1.0
-                    break
+            if position in self.POSITIONS:
+                processed_data[f'Должность_{position}'] = 1.0
             else:
                 # Если должность не найдена, ставим менеджера по умолчанию
                 processed_data['Должность_Менеджер по работе с клиентами'] = 1.0
+                self.default_counts['Должность (неизвестная)'] += 1
         else:
             processed_data['Должность_Менеджер по работе с клиентами'] = 1.0
+            self.default_counts['Должность'] += 1
         
         # 8. Пол (определяем по ФИО если не указан)
         if 'пол' in data:
@@ -228,6 +467,7 @@ class JSONPredictor:
                 processed_data['пол'] = 1.0  # мужской
         else:
             processed_data['пол'] = 1.0  # по умолчанию мужской
+            self.default_counts['пол'] += 1
         
         # Создаем DataFrame
         df = pd.DataFrame([processed_data])
@@ -244,6 +484,161 @@ class JSONPredictor:
         
         return df
     
+    def _manager_flag(self, data):
+        """Нормализованный флаг руководителя (по умолчанию - сотрудник)"""
+        return float(self.BINARY_MAPPING.get(data.get('В подчиненнии сотрудники'), 0))
+    
+    def group_flags(self, employees):
+        """Флаги для измерений RiskAggregator - те же, что в признаках модели"""
+        return {'Руководитель': [self._manager_flag(employee) for employee in employees]}
+    
+    def _kpi_values(self, data):
+        """Месяцы KPI записи и их значения.
+        
+        Ряд - месячные столбцы записи (kpi_columns) в их порядке, как
+        в DataProcessor; запись без них получает базовые месяцы модели
+        со значением 0.8. Нечисловые значения также заменяются на 0.8.
+        """
+        kpi_months = kpi_columns(data) or self.KPI_MONTHS
+        kpi_values = []
+        
+        for month in kpi_months:
+            if month in data:
+                kpi_value = data[month]
+                # Преобразуем в число если нужно
+                if isinstance(kpi_value, str):
+                    try:
+                        kpi_value = float(kpi_value) if kpi_value.replace('.', '').replace(',', '').isdigit() else 0.8
+                    except:
+                        kpi_value = 0.8
+                kpi_values.append(float(kpi_value))
+            else:
+                kpi_values.append(0.8)  # среднее значение по умолчанию
+        return kpi_months, kpi_values
+    
+    @staticmethod
+    def _kpi_statistics(kpi_matrix):
+        """Статистики KPI по строкам матрицы (сотрудники × месяцы).
+        
+        Считаются тем же накоплением по месяцам и для тех же окон
+        (config.KPI_WINDOWS), что и в DataProcessor, с соглашениями,
+        на которых обучена модель: заполненными считаются положительные
+        значения, std без поправки (ddof=0).
+        """
+        n_months = kpi_matrix.shape[1]
+        stats = {}
+        for window in KPI_WINDOWS:
+            history = KPIHistory(len(kpi_matrix), window)
+            for month_values in kpi_matrix.T:
+                history.add_month(month_values)
+            
+            window_stats = history.features(ddof=0)
+            window_stats['KPI_заполнено_показателей'] = history.positive.copy()
+            if min(n_months, window or n_months) <= 1:
+                window_stats['KPI_стабильность'] = np.full(len(kpi_matrix), 0.1)
+            
+            suffix = window_suffix(window)
+            stats.update((feature + suffix, values) for feature, values in window_stats.items())
+        return stats
+    
+    def _scale(self, scaler, features):
+        """Масштабирование матрицы признаков без накладных расходов pandas"""
+        if isinstance(scaler, StandardScaler):
+            scaled = np.asarray(features, dtype=float)
+            if scaler.with_mean:
+                scaled = scaled - scaler.mean_
+            if scaler.with_std:
+                scaled = scaled / scaler.scale_
+            return scaled
+        return scaler.transform(features)
+    
+    def create_drift_monitor(self, sample_rate=0.1):
+        """Монитор дрейфа: эталон из артефакта модели или из обучающего набора"""
+        if self.drift_reference is not None:
+            reference = ReferenceProfile.from_dict(self.drift_reference)
+        else:
+            from data_loader import DataLoader
+            splits = DataLoader.load_splits()
+            if splits is None or not self.expected_features:
+                print("❌ Нет эталонных данных для мониторинга дрейфа")
+                return None
+            reference = ReferenceProfile.build(
+                splits[0].reindex(columns=self.expected_features, fill_value=0.0)
+            )
+            self.drift_reference = reference.to_dict()
+        return DriftMonitor(reference, self.expected_features, sample_rate=sample_rate)
+    
+    def score_scenarios(self, employee_data, grid):
+        """Сценарии "что если" для одного сотрудника.
+        
+        grid - словарь {параметр: список значений}; оцениваются все комбинации.
+        Параметры: ключи SCENARIO_FEATURES, kpi_change (относительное
+        изменение всех месячных KPI, 0.1 = +10%) или имя признака модели;
+        месячный KPI ('KPI_октябрь') пересчитывает и статистики KPI.
+        Матрица признаков строится broadcast-ом от одного базового
+        преобразования и оценивается одним вызовом модели.
+        """
+        model, scaler = self.model, self.scaler
+        if model is None:
+            print("❌ Модель не загружена")
+            return None
+        
+        base = self.transform_to_model_features(employee_data)
+        columns = list(base.columns)
+        column_index = {name: i for i, name in enumerate(columns)}
+        
+        names = list(grid)
+        values = [np.asarray(grid[name], dtype=float) for name in names]
+        mesh = np.meshgrid(*values, indexing='ij') if values else []
+        n_scenarios = int(np.prod([len(v) for v in values])) if values else 1
+        
+        features = np.repeat(base.to_numpy(dtype=float), n_scenarios, axis=0)
+        axes = {name: axis_values.ravel() for name, axis_values in zip(names, mesh)}
+        
+        # Месячный ряд KPI сценариев - те же месяцы, что и в базовом
+        # преобразовании, включая не входящие в схему модели. kpi_change
+        # и значения отдельных месяцев ('KPI_октябрь') меняют ряд, и по
+        # нему пересчитываются статистики KPI
+        kpi_months, kpi_values = self._kpi_values(employee_data)
+        kpi_month_index = {f'KPI_{month}': i for i, month in enumerate(kpi_months)}
+        kpi_matrix = np.repeat(np.asarray(kpi_values)[None, :], n_scenarios, axis=0)
+        kpi_changed = 'kpi_change' in axes
+        if kpi_changed:
+            kpi_matrix = kpi_matrix * (1.0 + axes['kpi_change'][:, None])
+        
+        for name, axis_values in axes.items():
+            if name == 'kpi_change':
+                continue
+            feature = self.SCENARIO_FEATURES.get(name, name)
+            if feature in kpi_month_index:
+                kpi_matrix[:, kpi_month_index[feature]] = axis_values
+                kpi_changed = True
+                continue
+            if feature not in column_index:
+                print(f"⚠️  Признак '{feature}' не используется моделью, сценарий '{name}' не влияет")
+                continue
+            features[:, column_index[feature]] = axis_values
+        
+        if kpi_changed:
+            for month_index, month in enumerate(kpi_months):
+                if f'KPI_{month}' in column_index:
+                    features[:, column_index[f'KPI_{month}']] = kpi_matrix[:, month_index]
+            for feature, stats in self._kpi_statistics(kpi_matrix).items():
+                if feature in column_index:
+                    features[:, column_index[feature]] = stats
+        
+        scaled = self._scale(scaler, np.vstack([base.to_numpy(dtype=float), features]))
+        probability = model.predict_proba(scaled)
+        prediction = model.predict(scaled[1:])
+        base_probability = probability[0, 1]
+        burnout_probability = probability[1:, 1]
+        
+        scenarios = pd.DataFrame({name: axis_values.ravel() for name, axis_values in zip(names, mesh)})
+        scenarios['burnout_probability'] = burnout_probability
+        scenarios['prediction'] = prediction.astype(int)
+        scenarios['delta'] = burnout_probability - base_probability
+        return scenarios
+    
     def _experience_to_months(self, experience_str):
         """Преобразование стажа в месяцы"""
         if isinstance(experience_str, (int, float)):
@@ -308,28 +703,131 @@ class JSONPredictor:
     
     def predict_burnout(self, processed_data):
         """Предсказание выгорания для обработанных данных"""
-        if self.model is None:
+        batch_result = self.predict_batch(processed_data)
+        if batch_result is None:
+            return None
+        
+        result = {
+            'prediction': int(batch_result['prediction'][0]),  # Преобразуем в int для JSON
+            'burnout_probability': float(batch_result['burnout_probability'][0]),  # Вероятность выгорания
+            'no_burnout_probability': float(batch_result['no_burnout_probability'][0]),  # Вероятность отсутствия выгорания
+            'confidence': float(batch_result['confidence'][0])  # Уверенность предсказания
+        }
+        if 'probability_source' in batch_result:
+            result['probability_source'] = str(batch_result['probability_source'][0])
+        return result
+    
+    def predict_batch(self, processed_data, scaled_cache=None):
+        """Предсказание выгорания для батча обработанных данных
+        
+        scaled_cache - словарь масштабированных матриц батча; в него
+        кладется матрица чемпиона, чтобы претенденты с тем же scaler
+        ее переиспользовали.
+        """
+        # Фиксируем модель на весь батч: замена возможна только между батчами
+        model, scaler, scaler_key, cascade = self.model, self.scaler, self.scaler_key, self.cascade
+        if model is None:
             print("❌ Модель не загружена")
             return None
         
         # Масштабируем данные
         try:
-            scaled_data = self.scaler.transform(processed_data)
+            scaled_data = scaler.transform(processed_data)
         except ValueError as e:
             print(f"❌ Ошибка при масштабировании данных: {e}")
             return None
         
+        if scaled_cache is not None:
+            scaled_cache[scaler_key] = scaled_data
+        
+        if self.use_cascade and cascade is not None:
+            # Уверенные оценки скрининга не доходят до SVM
+            result, short_circuited = cascade.predict(model, scaled_data)
+            self.cascade_counts['total'] += len(scaled_data)
+            self.cascade_counts['short_circuited'] += short_circuited
+            return result
+        return self._predict_scaled(model, scaled_data)
+    
+    def predict_challengers(self, processed_data, scaled_cache=None):
+        """Предсказания всех претендентов для батча: {имя: результат как у predict_batch}.
+        
+        Масштабирование выполняется один раз на каждый различный scaler,
+        остальная стоимость - только вызов модели.
+        """
+        scaled_cache = {} if scaled_cache is None else scaled_cache
+        columns = list(processed_data.columns)
+        results = {}
+        for challenger in self.challengers:
+            scaled_data = scaled_cache.get(challenger['scaler_key'])
+            if scaled_data is None:
+                features = processed_data
+                if challenger['feature_names'] != columns:
+                    features = processed_data.reindex(columns=challenger['feature_names'], fill_value=0.0)
+                scaled_data = self._scale(challenger['scaler'], features)
+                scaled_cache[challenger['scaler_key']] = scaled_data
+            results[challenger['name']] = self._predict_scaled(challenger['model'], scaled_data)
+        return results
+    
+    @staticmethod
+    def _predict_scaled(model, scaled_data):
         # Предсказание
-        prediction = self.model.predict(scaled_data)
-        probability = self.model.predict_proba(scaled_data)
+        prediction = model.predict(scaled_data)
+        probability = model.predict_proba(scaled_data)
         
         return {
-            'prediction': int(prediction[0]),  # Преобразуем в int для JSON
-            'burnout_probability': float(probability[0, 1]),  # Вероятность выгорания
-            'no_burnout_probability': float(probability[0, 0]),  # Вероятность отсутствия выгорания
-            'confidence': float(max(probability[0]))  # Уверенность предсказания
+            'prediction': prediction,
+            'burnout_probability': probability[:, 1],
+            'no_burnout_probability': probability[:, 0],
+            'confidence': probability.max(axis=1)
         }
     
+    def score_processed_records(self, records):
+        """Оценка записей обработанного датасета (DataManager) для таблицы прогнозов.
+        
+        Возвращает кортежи (prediction, burnout_probability,
+        no_burnout_probability, confidence, status).
+        """
+        processed_data = pd.DataFrame(records).reindex(columns=self.expected_features)
+        processed_data = processed_data.apply(pd.to_numeric, errors='coerce').fillna(0.0).astype(float)
+        result = self.predict_batch(processed_data)
+        if result is None:
+            raise ValueError("Не удалось получить прогнозы для обработанных записей")
+        
+        scores = []
+        for i in range(len(processed_data)):
+            row = {key: values[i] for key, values in result.items()}
+            scores.append((
+                int(row['prediction']),
+                float(row['burnout_probability']),
+                float(row['no_burnout_probability']),
+                float(row['confidence']),
+                self.interpret_prediction(row)['status']
+            ))
+        return scores
+    
+    def enable_cascade(self):
+        """Включение каскадной оценки (скрининг, затем SVM для неуверенных)"""
+        if self.cascade is None:
+            print("⚠️  В артефакте модели нет модели-скрининга, каскад недоступен")
+            return False
+        if self.cascade.empty:
+            print("⚠️  Полоса каскада пуста (мало данных для калибровки), все записи оцениваются SVM")
+            return False
+        self.use_cascade = True
+        calibration = self.cascade.calibration
+        print(f"⚡ Каскад включен: SVM для вероятности скрининга в "
+              f"[{self.cascade.low:.3f}, {self.cascade.high:.3f}]"
+              + (f", вне фолдов без SVM {calibration['short_circuit_rate']:.1%}, "
+                 f"расхождение {calibration['disagreement']:.2%}" if calibration else ""))
+        return True
+    
+    def print_cascade_report(self):
+        total = self.cascade_counts['total']
+        if total:
+            short_circuited = self.cascade_counts['short_circuited']
+            print(f"\n⚡ КАСКАД: без SVM оценено {short_circuited} из {total} "
+                  f"({short_circuited / total:.1%})")
+    
     def interpret_prediction(self, prediction_result):
         """Интерпретация результатов предсказания"""
         prediction = prediction_result['prediction']
@@ -365,75 +863,208 @@ class JSONPredictor:
         
         return interpretation
     
-    def process_json_file(self, json_path):
-        """Обработка всего JSON файла"""
-        data = self.load_json_data(json_path)
-        if data is None:
-            return None
+    def process_json_file(self, json_path, batch_size=256, explain_top=0,
+                          aggregator=None, collect_results=True, drift_monitor=None,
+                          comparison=None, top_risk=None, checkpoint=None):
+        """Обработка всего JSON файла
         
+        Вход читается потоково. aggregator (RiskAggregator), drift_monitor
+        (DriftMonitor), comparison (AgreementStats, при наличии претендентов)
+        и top_risk (TopRisk) обновляются после каждого батча;
+        collect_results=False не хранит результаты по сотрудникам.
+        checkpoint (ScoringCheckpoint) фиксирует результаты и агрегаты
+        порциями; повторный запуск продолжает с последней порции.
+        """
+        employees = self.iter_json_employees(json_path)
         results = []
         
-        # Проверяем структуру JSON
-        if isinstance(data, list):
-            # Массив сотрудников
-            employees = data
-        elif isinstance(data, dict):
-            # Один сотрудник или объект с данными
-            if 'employees' in data:
-                employees = data['employees']
-            else:
-                employees = [data]  # Один сотрудник
-        else:
-            print("❌ Неподдерживаемый формат JSON")
-            return None
+        start = 0
+        if checkpoint is not None:
+            run_key = self._checkpoint_run_key(batch_size, explain_top, collect_results)
+            state = checkpoint.begin(json_path, run_key)
+            if state is not None:
+                self._restore_checkpoint_aggregates(state['aggregates'], aggregator,
+                                                    drift_monitor, comparison, top_risk)
+                start = state['processed']
+                employees = iter(()) if state['complete'] else islice(employees, start, None)
         
-        print(f"🔍 Обработка {len(employees)} сотрудников...")
+        print(f"🔍 Обработка сотрудников батчами по {batch_size}...")
         
-        for i, employee_data in enumerate(employees):
-            print(f"\n👤 Сотрудник {i+1}:")
+        batches_since_commit = 0
+        while True:
+            if checkpoint is not None and batches_since_commit >= checkpoint.commit_every:
+                checkpoint.commit(results, start, self._checkpoint_aggregates(
+                    aggregator, drift_monitor, comparison, top_risk))
+                results = []
+                batches_since_commit = 0
+            
+            chunk = list(islice(employees, batch_size))
+            if not chunk:
+                break
+            batches_since_commit += 1
             
-            # Извлекаем идентификатор сотрудника
-            employee_id = employee_data.get('ФИО', f'Сотрудник_{i+1}')
-            print(f"   ID: {employee_id}")
+            # Между батчами подхватываем подготовленную новую модель
+            self.swap_pending_model()
             
-            # Обрабатываем данные
-            processed_data = self.process_single_employee(employee_data)
+            batch = []
+            for i, employee_data in enumerate(chunk, start=start):
+                # Извлекаем идентификатор сотрудника
+                employee_id = employee_data.get('ФИО', f'Сотрудник_{i+1}')
+                
+                # Обрабатываем данные
+                processed_data = self.process_single_employee(employee_data)
+                
+                # Проверяем, что данные корректны
+                if processed_data.empty:
+                    print(f"\n👤 Сотрудник {i+1}:")
+                    print(f"   ID: {employee_id}")
+                    print(f"   ❌ Не удалось обработать данные сотрудника")
+                    continue
+                
+                batch.append((i, employee_id, processed_data, employee_data))
             
-            # Проверяем, что данные корректны
-            if processed_data.empty:
-                print(f"   ❌ Не удалось обработать данные сотрудника")
+            start += len(chunk)
+            if not batch:
                 continue
             
-            # Предсказание
-            prediction_result = self.predict_burnout(processed_data)
-            if prediction_result is None:
+            # Предсказание для всего батча
+            batch_features = pd.concat([item[2] for item in batch], ignore_index=True)
+            scaled_cache = {}
+            batch_result = self.predict_batch(batch_features, scaled_cache)
+            if batch_result is None:
                 continue
             
-            # Интерпретация
-            interpretation = self.interpret_prediction(prediction_result)
+            # Претенденты на той же матрице признаков
+            challenger_results = None
+            if self.challengers:
+                challenger_results = self.predict_challengers(batch_features, scaled_cache)
+                if comparison is not None:
+                    for name, challenger_result in challenger_results.items():
+                        comparison.update(name, batch_result, challenger_result)
+            
+            if drift_monitor is not None:
+                drift_monitor.update(batch_features.to_numpy(dtype=float))
+            
+            # Агрегаты по группам обновляются по батчу целиком
+            if aggregator is not None:
+                batch_employees = [item[3] for item in batch]
+                aggregator.update(batch_employees, batch_result['burnout_probability'],
+                                  batch_result['prediction'], self.group_flags(batch_employees))
             
-            # Формируем результат
-            result = {
-                'employee_id': employee_id,
-                'prediction': prediction_result['prediction'],
-                'burnout_probability': round(prediction_result['burnout_probability'], 4),
-                'no_burnout_probability': round(prediction_result['no_burnout_probability'], 4),
-                'confidence': round(prediction_result['confidence'], 4),
-                'status': interpretation['status'],
-                'recommendation': interpretation['recommendation'],
-                'color': interpretation['color']
-            }
+            # Вклад признаков: для всего батча, если результаты сохраняются,
+            # иначе только для кандидатов в top-K (без top-K не нужен вовсе)
+            top_factors = None
+            if explain_top:
+                explain_rows = list(range(len(batch)))
+                if not collect_results:
+                    explain_rows = (top_risk.candidates([item[3] for item in batch],
+                                                        batch_result['burnout_probability'])
+                                    if top_risk is not None else [])
+                if explain_rows:
+                    if self.attributor is None:
+                        self.attributor = FeatureAttributor(self)
+                    contributions, _ = self.attributor.explain(batch_features.iloc[explain_rows])
+                    top_factors = dict(zip(explain_rows,
+                                           FeatureAttributor.top_factors(contributions, explain_top)))
             
-            results.append(result)
+            if top_risk is not None:
+                top_risk.update([item[3] for item in batch], [item[1] for item in batch],
+                                [item[0] for item in batch], batch_result, top_factors=top_factors)
             
-            # Вывод результата
-            print(f"   {interpretation['color']} Статус: {interpretation['status']}")
-            print(f"   📊 Вероятность выгорания: {prediction_result['burnout_probability']:.1%}")
-            print(f"   🎯 Уверенность: {prediction_result['confidence']:.1%}")
-            print(f"   💡 Рекомендация: {interpretation['recommendation']}")
+            for row, (i, employee_id, _, _) in enumerate(batch):
+                prediction_result = {
+                    'prediction': int(batch_result['prediction'][row]),
+                    'burnout_probability': float(batch_result['burnout_probability'][row]),
+                    'no_burnout_probability': float(batch_result['no_burnout_probability'][row]),
+                    'confidence': float(batch_result['confidence'][row])
+                }
+                
+                # Интерпретация
+                interpretation = self.interpret_prediction(prediction_result)
+                
+                # Формируем результат
+                result = {
+                    'employee_id': employee_id,
+                    'prediction': prediction_result['prediction'],
+                    'burnout_probability': round(prediction_result['burnout_probability'], 4),
+                    'no_burnout_probability': round(prediction_result['no_burnout_probability'], 4),
+                    'confidence': round(prediction_result['confidence'], 4),
+                    'status': interpretation['status'],
+                    'recommendation': interpretation['recommendation'],
+                    'color': interpretation['color']
+                }
+                if 'probability_source' in batch_result:
+                    # Каскад: вероятность модели-скрининга или SVM
+                    result['probability_source'] = str(batch_result['probability_source'][row])
+                if top_factors is not None and row in top_factors:
+                    result['top_factors'] = top_factors[row]
+                if challenger_results is not None:
+                    result['challengers'] = {
+                        name: {
+                            'prediction': int(challenger_result['prediction'][row]),
+                            'burnout_probability': round(float(challenger_result['burnout_probability'][row]), 4),
+                            'agrees': int(challenger_result['prediction'][row]) == prediction_result['prediction']
+                        }
+                        for name, challenger_result in challenger_results.items()
+                    }
+                
+                if collect_results:
+                    results.append(result)
+                
+                # Вывод результата
+                print(f"\n👤 Сотрудник {i+1}:")
+                print(f"   ID: {employee_id}")
+                print(f"   {interpretation['color']} Статус: {interpretation['status']}")
+                print(f"   📊 Вероятность выгорания: {prediction_result['burnout_probability']:.1%}")
+                print(f"   🎯 Уверенность: {prediction_result['confidence']:.1%}")
+                print(f"   💡 Рекомендация: {interpretation['recommendation']}")
         
+        if checkpoint is not None:
+            checkpoint.commit(results, start, self._checkpoint_aggregates(
+                aggregator, drift_monitor, comparison, top_risk), complete=True)
+            results = list(checkpoint.iter_results())
+        
+        print(f"\n🔍 Обработано сотрудников: {start}")
         return results
     
+    def _checkpoint_run_key(self, batch_size, explain_top, collect_results):
+        """Параметры, от которых зависит результат прогона"""
+        run_key = {
+            'model_version': self.model_version,
+            'challengers': [challenger['name'] for challenger in self.challengers],
+            'cascade': bool(self.use_cascade and self.cascade is not None),
+            'batch_size': batch_size,
+            'explain_top': explain_top,
+            'collect_results': collect_results
+        }
+        if explain_top and self.attributor is not None:
+            run_key['explain'] = [self.attributor.method, self.attributor.n_permutations,
+                                  self.attributor.n_background]
+        return run_key
+    
+    def _checkpoint_aggregates(self, aggregator, drift_monitor, comparison, top_risk):
+        return {
+            'default_counts': dict(self.default_counts),
+            'cascade_counts': dict(self.cascade_counts),
+            'aggregator': aggregator.to_dict() if aggregator is not None else None,
+            'drift_monitor': drift_monitor.get_state() if drift_monitor is not None else None,
+            'comparison': comparison.to_dict() if comparison is not None else None,
+            'top_risk': top_risk.to_dict() if top_risk is not None else None
+        }
+    
+    def _restore_checkpoint_aggregates(self, saved, aggregator, drift_monitor, comparison, top_risk):
+        """Восстановление агрегатов прогона (объекты только что созданы и пусты)"""
+        self.default_counts.update(saved.get('default_counts') or {})
+        self.cascade_counts.update(saved.get('cascade_counts') or {})
+        if aggregator is not None and saved.get('aggregator'):
+            aggregator.merge(RiskAggregator.from_dict(saved['aggregator']))
+        if drift_monitor is not None and saved.get('drift_monitor'):
+            drift_monitor.set_state(saved['drift_monitor'])
+        if comparison is not None and saved.get('comparison'):
+            comparison.merge(AgreementStats.from_dict(saved['comparison']))
+        if top_risk is not None and saved.get('top_risk'):
+            top_risk.merge(TopRisk.from_dict(saved['top_risk']))
+    
     def save_results(self, results, output_path='prediction_results.json'):
         """Сохранение результатов в JSON файл"""
         try:
@@ -466,6 +1097,40 @@ def main():
                        help='Путь для сохранения результатов')
     parser.add_argument('--model', '-m', default='svm_model.pkl', 
                        help='Путь к файлу модели')
+    parser.add_argument('--registry', '-r', default=None,
+                       help='Каталог реестра моделей (вместо --model)')
+    parser.add_argument('--watch', type=float, default=None, metavar='SECONDS',
+                       help='Следить за реестром и заменять модель между батчами')
+    parser.add_argument('--batch-size', type=int, default=256,
+                       help='Размер батча для предсказания')
+    parser.add_argument('--explain', type=int, default=0, metavar='TOP',
+                       help='Добавить TOP главных факторов риска для каждого сотрудника')
+    parser.add_argument('--explain-method', choices=['shapley', 'occlusion'], default='shapley',
+                       help='Метод атрибуции признаков')
+    parser.add_argument('--explain-permutations', type=int, default=16,
+                       help='Число перестановок для shapley (точность/стоимость)')
+    parser.add_argument('--summary', default=None,
+                       help='Сохранить агрегаты по группам (объединяются между шардами)')
+    parser.add_argument('--summary-only', action='store_true',
+                       help='Не сохранять результаты по сотрудникам, только агрегаты')
+    parser.add_argument('--drift-report', default=None,
+                       help='Сохранить отчет о дрейфе входных признаков')
+    parser.add_argument('--drift-sample', type=float, default=0.1,
+                       help='Доля строк, попадающих в мониторинг дрейфа')
+    parser.add_argument('--challenger', action='append', default=[], metavar='MODEL',
+                       help='Модель-претендент (файл или версия реестра); можно указать несколько раз')
+    parser.add_argument('--comparison-report', default=None,
+                       help='Сохранить статистику согласия чемпиона и претендентов')
+    parser.add_argument('--top', type=int, default=None, metavar='K',
+                       help='Сохранить в --output только K сотрудников с наибольшим риском')
+    parser.add_argument('--top-by', default=None, metavar='FIELD',
+                       help='Top-K отдельно для каждого значения поля (например, Город)')
+    parser.add_argument('--checkpoint', default=None, metavar='DIR',
+                       help='Каталог контрольных точек: прерванный прогон продолжается с последней порции')
+    parser.add_argument('--checkpoint-every', type=int, default=8, metavar='BATCHES',
+                       help='Фиксировать результаты каждые N батчей')
+    parser.add_argument('--cascade', action='store_true',
+                       help='Каскадная оценка: SVM только для неуверенных оценок модели-скрининга')
     
     args = parser.parse_args()
     
@@ -473,27 +1138,79 @@ def main():
     print("=" * 50)
     
     # Инициализация предсказателя
-    predictor = JSONPredictor(args.model)
+    predictor = JSONPredictor(args.model, registry_dir=args.registry)
     
     if predictor.model is None:
         return
     
+    if args.watch and args.registry:
+        predictor.watch_registry(interval=args.watch)
+    
+    if args.cascade:
+        predictor.enable_cascade()
+    
+    if args.explain:
+        predictor.attributor = FeatureAttributor(
+            predictor, method=args.explain_method, n_permutations=args.explain_permutations
+        )
+    
+    drift_monitor = predictor.create_drift_monitor(args.drift_sample) if args.drift_report else None
+    
+    for challenger in args.challenger:
+        predictor.add_challenger(challenger)
+    comparison = AgreementStats(predictor.model_version) if predictor.challengers else None
+    
+    top_risk = None
+    if args.top:
+        top_risk = TopRisk(args.top, group_field=args.top_by, interpret=predictor.interpret_prediction)
+    
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = ScoringCheckpoint(args.checkpoint, commit_every=args.checkpoint_every)
+    
     # Обработка JSON файла
-    results = predictor.process_json_file(args.json_file)
+    aggregator = RiskAggregator()
+    results = predictor.process_json_file(args.json_file, batch_size=args.batch_size,
+                                          explain_top=args.explain, aggregator=aggregator,
+                                          collect_results=not (args.summary_only or top_risk),
+                                          drift_monitor=drift_monitor, comparison=comparison,
+                                          top_risk=top_risk, checkpoint=checkpoint)
+    predictor.stop_watching()
+    
+    if top_risk is not None:
+        top_risk.print_report()
+        top_risk.save(args.output)
     
     if results:
         # Сохранение результатов
         predictor.save_results(results, args.output)
-        
-        # Статистика
-        burnout_count = sum(1 for r in results if r['prediction'] == 1)
-        total_count = len(results)
+    
+    if args.summary:
+        aggregator.save(args.summary)
+    
+    if drift_monitor is not None:
+        drift = drift_monitor.save_report(args.drift_report, predictor.default_counts)
+        if drift['drifted']:
+            print(f"⚠️  Дрейф признаков: {', '.join(drift['drifted'][:5])}")
+    
+    # Статистика (из агрегатов, без просмотра результатов)
+    total_count = aggregator.total['count']
+    if total_count:
+        burnout_count = aggregator.total['burnout']
         
         print(f"\n📈 СТАТИСТИКА:")
         print(f"   Всего сотрудников: {total_count}")
         print(f"   С выгоранием: {burnout_count}")
         print(f"   Без выгорания: {total_count - burnout_count}")
         print(f"   Процент выгорания: {burnout_count/total_count*100:.1f}%")
+        aggregator.print_report()
+    
+    predictor.print_cascade_report()
+    
+    if comparison is not None:
+        comparison.print_report()
+        if args.comparison_report:
+            comparison.save(args.comparison_report)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
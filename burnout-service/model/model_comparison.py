@@ -0,0 +1,102 @@
+# model_comparison.py
+import json
+
+import numpy as np
+
+
+class AgreementStats:
+    """Согласие модели-чемпиона и претендентов на одних и тех же сотрудниках.
+
+    Хранятся только счетчики таблицы 2×2 и суммы разностей вероятностей,
+    поэтому статистика батчей и шардов складывается точно.
+    """
+
+    def __init__(self, champion=None):
+        self.champion = champion
+        self.models = {}
+
+    def _stats(self, name):
+        if name not in self.models:
+            self.models[name] = {
+                'count': 0, 'agree': 0,
+                'both_burnout': 0, 'champion_only': 0, 'challenger_only': 0,
+                'abs_diff_sum': 0.0, 'diff_sum': 0.0, 'max_abs_diff': 0.0
+            }
+        return self.models[name]
+
+    def update(self, name, champion_result, challenger_result):
+        """Учет батча: результаты predict_batch чемпиона и претендента"""
+        champion = np.asarray(champion_result['prediction']).astype(int)
+        challenger = np.asarray(challenger_result['prediction']).astype(int)
+        diff = (np.asarray(challenger_result['burnout_probability'], dtype=float)
+                - np.asarray(champion_result['burnout_probability'], dtype=float))
+        if len(diff) == 0:
+            return self
+
+        stats = self._stats(name)
+        stats['count'] += len(diff)
+        stats['agree'] += int((champion == challenger).sum())
+        stats['both_burnout'] += int(((champion == 1) & (challenger == 1)).sum())
+        stats['champion_only'] += int(((champion == 1) & (challenger == 0)).sum())
+        stats['challenger_only'] += int(((champion == 0) & (challenger == 1)).sum())
+        stats['abs_diff_sum'] += float(np.abs(diff).sum())
+        stats['diff_sum'] += float(diff.sum())
+        stats['max_abs_diff'] = max(stats['max_abs_diff'], float(np.abs(diff).max()))
+        return self
+
+    def merge(self, other):
+        for name, other_stats in other.models.items():
+            stats = self._stats(name)
+            for key, value in other_stats.items():
+                if key == 'max_abs_diff':
+                    stats[key] = max(stats[key], value)
+                else:
+                    stats[key] += value
+        return self
+
+    def summary(self):
+        """Доля совпадений, каппа Коэна и сдвиг вероятностей для каждого претендента"""
+        report = {}
+        for name, stats in self.models.items():
+            count = stats['count']
+            if count == 0:
+                continue
+            agreement = stats['agree'] / count
+            champion_rate = (stats['both_burnout'] + stats['champion_only']) / count
+            challenger_rate = (stats['both_burnout'] + stats['challenger_only']) / count
+            expected = champion_rate * challenger_rate + (1 - champion_rate) * (1 - challenger_rate)
+            report[name] = {
+                'count': count,
+                'agreement': agreement,
+                'kappa': (agreement - expected) / (1 - expected) if expected < 1 else 1.0,
+                'champion_burnout_rate': champion_rate,
+                'challenger_burnout_rate': challenger_rate,
+                'champion_only': stats['champion_only'],
+                'challenger_only': stats['challenger_only'],
+                'mean_probability_diff': stats['diff_sum'] / count,
+                'mean_abs_probability_diff': stats['abs_diff_sum'] / count,
+                'max_abs_probability_diff': stats['max_abs_diff']
+            }
+        return report
+
+    def print_report(self):
+        print(f"\n🥊 СРАВНЕНИЕ С ЧЕМПИОНОМ ({self.champion}):")
+        for name, stats in self.summary().items():
+            print(f"   {name}: совпадение {stats['agreement']:.1%} (каппа {stats['kappa']:.3f}), "
+                  f"выгорание {stats['champion_burnout_rate']:.1%} → {stats['challenger_burnout_rate']:.1%}, "
+                  f"только чемпион {stats['champion_only']}, только претендент {stats['challenger_only']}, "
+                  f"|Δp| среднее {stats['mean_abs_probability_diff']:.4f}, макс {stats['max_abs_probability_diff']:.4f}")
+
+    def to_dict(self):
+        return {'champion': self.champion, 'models': self.models}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data.get('champion'))
+        stats.models = {name: dict(values) for name, values in data['models'].items()}
+        return stats
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(self.to_dict(), summary=self.summary()), f, ensure_ascii=False, indent=2)
+        print(f"💾 Сравнение моделей сохранено в {path}")
@@ -0,0 +1,277 @@
+# model_registry.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+
+import joblib
+
+MANIFEST_NAME = 'manifest.json'
+ARTIFACT_NAME = 'model.pkl'
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    """SHA-256 файла (читается блоками)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_feature_names(model_data):
+    """Схема признаков артефакта: явная или из обученного scaler"""
+    feature_names = model_data.get('feature_names')
+    if feature_names is None:
+        feature_names = getattr(model_data.get('scaler'), 'feature_names_in_', None)
+    return list(feature_names) if feature_names is not None else None
+
+
+def resolve_feature_names(model_data):
+    """Схема признаков артефакта; для старых артефактов без нее - из обучающей выборки.
+
+    Вызывается при загрузке из файла и при регистрации/продвижении версии,
+    чтобы в горячем пути (замена модели между батчами) данные не читались.
+    """
+    feature_names = artifact_feature_names(model_data)
+    if feature_names is None:
+        from data_loader import DataLoader
+        splits = DataLoader.load_splits()
+        if splits:
+            feature_names = list(splits[0].columns)
+    return feature_names
+
+
+def validate_artifact(model_data):
+    """Проверка, что артефакт пригоден для JSONPredictor"""
+    if not isinstance(model_data, dict):
+        raise ValueError("Артефакт модели должен быть словарем")
+    for key in ('model', 'scaler'):
+        if key not in model_data:
+            raise ValueError(f"В артефакте отсутствует ключ '{key}'")
+    if not hasattr(model_data['model'], 'predict_proba'):
+        raise ValueError("Модель не поддерживает predict_proba")
+
+    feature_names = artifact_feature_names(model_data)
+    n_features = getattr(model_data['scaler'], 'n_features_in_', None)
+    if feature_names is not None and n_features is not None and len(feature_names) != n_features:
+        raise ValueError(
+            f"Схема признаков ({len(feature_names)}) не совпадает со scaler ({n_features})"
+        )
+    return model_data
+
+
+class ModelRegistry:
+    """Локальный версионированный реестр моделей.
+
+    Структура каталога:
+        <root>/manifest.json      - список версий, текущая и предыдущая
+        <root>/v0001/model.pkl    - неизменяемый артефакт версии
+    """
+
+    def __init__(self, root='models'):
+        self.root = root
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def load_manifest(self):
+        """Чтение манифеста (пустой, если реестр еще не создан)"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'current': None, 'previous': None, 'versions': []}
+
+    def _write_manifest(self, manifest):
+        """Атомарная запись манифеста через временный файл"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def list_versions(self):
+        return self.load_manifest()['versions']
+
+    def current_version(self):
+        return self.load_manifest()['current']
+
+    def get_entry(self, version=None):
+        """Запись манифеста для версии (по умолчанию - текущей)"""
+        manifest = self.load_manifest()
+        version = version or manifest['current']
+        for entry in manifest['versions']:
+            if entry['version'] == version:
+                return entry
+        raise KeyError(f"Версия модели '{version}' не найдена в реестре {self.root}")
+
+    def register(self, model_path, activate=True, notes=None):
+        """Добавление артефакта в реестр как новой версии"""
+        model_data = validate_artifact(joblib.load(model_path))
+        feature_names = resolve_feature_names(model_data)
+        if feature_names is None:
+            raise ValueError(f"Не удалось определить схему признаков артефакта {model_path}")
+
+        with self._lock:
+            manifest = self.load_manifest()
+            version = f"v{len(manifest['versions']) + 1:04d}"
+            version_dir = os.path.join(self.root, version)
+
+            # Копируем во временный каталог и переименовываем целиком,
+            # чтобы наблюдатели не увидели недописанный артефакт
+            tmp_dir = version_dir + '.tmp'
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            shutil.copyfile(model_path, os.path.join(tmp_dir, ARTIFACT_NAME))
+            os.replace(tmp_dir, version_dir)
+
+            entry = {
+                'version': version,
+                'file': os.path.join(version, ARTIFACT_NAME),
+                'sha256': file_checksum(os.path.join(version_dir, ARTIFACT_NAME)),
+                'created': datetime.now().isoformat(),
+                'source': os.path.abspath(model_path),
+                'feature_names': feature_names,
+                'metrics': model_data.get('metrics', {}),
+                'notes': notes
+            }
+            manifest['versions'].append(entry)
+            if activate:
+                manifest['previous'] = manifest['current']
+                manifest['current'] = version
+            self._write_manifest(manifest)
+
+        print(f"📦 Модель зарегистрирована как {version}")
+        return entry
+
+    def promote(self, version):
+        """Сделать версию текущей (у версии должна быть схема признаков)"""
+        with self._lock:
+            manifest = self.load_manifest()
+            entry = next((entry for entry in manifest['versions'] if entry['version'] == version), None)
+            if entry is None:
+                raise KeyError(f"Версия модели '{version}' не найдена в реестре {self.root}")
+            if not entry.get('feature_names'):
+                # Версии, зарегистрированные без схемы: определяем ее сейчас
+                model_data = joblib.load(os.path.join(self.root, entry['file']))
+                entry['feature_names'] = resolve_feature_names(model_data)
+                if entry['feature_names'] is None:
+                    raise ValueError(f"У версии {version} нет схемы признаков")
+                self._write_manifest(manifest)
+            if manifest['current'] != version:
+                manifest['previous'] = manifest['current']
+                manifest['current'] = version
+                self._write_manifest(manifest)
+        return version
+
+    def rollback(self):
+        """Откат на предыдущую версию"""
+        with self._lock:
+            manifest = self.load_manifest()
+            if not manifest['previous']:
+                raise ValueError("Нет предыдущей версии для отката")
+            manifest['current'], manifest['previous'] = manifest['previous'], manifest['current']
+            self._write_manifest(manifest)
+        print(f"↩️  Текущая версия модели: {manifest['current']}")
+        return manifest['current']
+
+    def load(self, version=None):
+        """Загрузка и проверка версии: контрольная сумма и схема признаков"""
+        entry = self.get_entry(version)
+        path = os.path.join(self.root, entry['file'])
+        if file_checksum(path) != entry['sha256']:
+            raise ValueError(f"Контрольная сумма артефакта {entry['version']} не совпадает")
+
+        model_data = validate_artifact(joblib.load(path))
+        feature_names = artifact_feature_names(model_data) or entry.get('feature_names')
+        if not feature_names:
+            raise ValueError(f"У версии {entry['version']} нет схемы признаков")
+        return {
+            'version': entry['version'],
+            'model': model_data['model'],
+            'scaler': model_data['scaler'],
+            'metrics': model_data.get('metrics', {}),
+            'feature_names': feature_names,
+            'drift_reference': model_data.get('drift_reference'),
+            'cascade': model_data.get('cascade')
+        }
+
+
+class RegistryWatcher(threading.Thread):
+    """Фоновый наблюдатель: загружает новую текущую версию вне горячего пути
+    и передает ее в callback, который готовит замену модели"""
+
+    def __init__(self, registry, get_active_version, on_ready, interval=5.0):
+        super().__init__(daemon=True)
+        self.registry = registry
+        self.get_active_version = get_active_version
+        self.on_ready = on_ready
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        try:
+            version = self.registry.current_version()
+            if version is None or version == self.get_active_version():
+                return
+            bundle = self.registry.load(version)
+        except Exception as e:
+            print(f"❌ Не удалось загрузить модель из реестра: {e}")
+            return
+        self.on_ready(bundle)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def main():
+    """Управление реестром моделей из командной строки"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Реестр версий моделей выгорания')
+    parser.add_argument('--registry', '-r', default='models', help='Каталог реестра')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    register_parser = subparsers.add_parser('register', help='Зарегистрировать артефакт модели')
+    register_parser.add_argument('model_path', help='Путь к файлу модели')
+    register_parser.add_argument('--no-activate', action='store_true',
+                                 help='Не делать версию текущей')
+    register_parser.add_argument('--notes', default=None, help='Комментарий к версии')
+
+    subparsers.add_parser('list', help='Показать версии')
+
+    promote_parser = subparsers.add_parser('promote', help='Сделать версию текущей')
+    promote_parser.add_argument('version')
+
+    subparsers.add_parser('rollback', help='Откатиться на предыдущую версию')
+
+    args = parser.parse_args()
+    registry = ModelRegistry(args.registry)
+
+    if args.command == 'register':
+        registry.register(args.model_path, activate=not args.no_activate, notes=args.notes)
+    elif args.command == 'list':
+        manifest = registry.load_manifest()
+        for entry in manifest['versions']:
+            marker = '*' if entry['version'] == manifest['current'] else ' '
+            print(f" {marker} {entry['version']}  {entry['created']}  {entry['sha256'][:12]}  {entry.get('metrics', {})}")
+    elif args.command == 'promote':
+        registry.promote(args.version)
+        print(f"✅ Текущая версия модели: {args.version}")
+    elif args.command == 'rollback':
+        registry.rollback()
+
+
+if __name__ == "__main__":
+    main()
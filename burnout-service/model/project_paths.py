@@ -0,0 +1,15 @@
+# project_paths.py
+import sys
+from pathlib import Path
+
+# Корень проекта с конвейером предобработки (config, DataManager)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def import_data_manager():
+    """DataManager из корня проекта (хранилище обработанных данных)"""
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    import config
+    from data_manager import DataManager
+    return DataManager, config
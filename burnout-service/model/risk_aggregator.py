@@ -0,0 +1,199 @@
+# risk_aggregator.py
+import json
+
+import numpy as np
+
+# Измерения для разбивки: имя -> поле исходной записи сотрудника
+DEFAULT_GROUP_FIELDS = {
+    'Город': 'Город',
+    'Должность': 'Должность',
+    'юр.лицо': 'юр.лицо'
+}
+
+# Измерения по флагам 0/1, которые предиктор уже нормализовал
+# (опечатки вроде 'Сотрутник' дают тот же 0): имя -> подписи значений
+DEFAULT_FLAG_GROUPS = {
+    'Руководитель': ['сотрудник', 'руководитель']
+}
+
+TOTAL_DIMENSION = 'Всего'
+TOTAL_GROUP = 'все'
+
+
+class RiskAggregator:
+    """Потоковые агрегаты по группам сотрудников.
+
+    Для каждой группы хранятся счетчики и гистограмма вероятностей
+    с фиксированными корзинами, поэтому агрегаты шардов складываются
+    точно, а квантили считаются без хранения отдельных результатов.
+    """
+
+    def __init__(self, group_fields=None, bins=100, flag_groups=None):
+        self.group_fields = dict(group_fields or DEFAULT_GROUP_FIELDS)
+        self.flag_groups = dict(DEFAULT_FLAG_GROUPS if flag_groups is None else flag_groups)
+        self.bins = bins
+        self.groups = {}
+
+    def _group(self, dimension, value):
+        groups = self.groups.setdefault(dimension, {})
+        if value not in groups:
+            groups[value] = {
+                'count': 0, 'burnout': 0, 'probability_sum': 0.0,
+                'histogram': np.zeros(self.bins, dtype=np.int64)
+            }
+        return groups[value]
+
+    def update(self, employees, probabilities, predictions, flags=None):
+        """Учет батча: employees - исходные записи, остальное - массивы модели.
+
+        flags - {измерение: массив 0/1} для измерений flag_groups
+        (без него такие измерения не учитываются).
+        """
+        probabilities = np.asarray(probabilities, dtype=float)
+        predictions = np.asarray(predictions).astype(int)
+        if len(probabilities) == 0:
+            return self
+
+        bin_index = np.clip((probabilities * self.bins).astype(int), 0, self.bins - 1)
+        dimensions = {TOTAL_DIMENSION: [TOTAL_GROUP] * len(employees)}
+        for dimension, field in self.group_fields.items():
+            dimensions[dimension] = [
+                str(employee.get(field, 'не указано')).strip() for employee in employees
+            ]
+        for dimension, labels in self.flag_groups.items():
+            if flags is not None and dimension in flags:
+                dimensions[dimension] = [labels[int(flag)] for flag in flags[dimension]]
+
+        for dimension, values in dimensions.items():
+            labels, inverse = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+            n_groups = len(labels)
+            counts = np.bincount(inverse, minlength=n_groups)
+            burnout = np.bincount(inverse, weights=predictions, minlength=n_groups)
+            probability_sum = np.bincount(inverse, weights=probabilities, minlength=n_groups)
+            histograms = np.bincount(
+                inverse * self.bins + bin_index, minlength=n_groups * self.bins
+            ).reshape(n_groups, self.bins)
+
+            for i, label in enumerate(labels):
+                group = self._group(dimension, label)
+                group['count'] += int(counts[i])
+                group['burnout'] += int(burnout[i])
+                group['probability_sum'] += float(probability_sum[i])
+                group['histogram'] += histograms[i]
+        return self
+
+    def merge(self, other):
+        """Точное объединение с агрегатами другого шарда"""
+        if other.bins != self.bins:
+            raise ValueError("Нельзя объединить агрегаты с разным числом корзин")
+        for dimension, groups in other.groups.items():
+            for value, stats in groups.items():
+                group = self._group(dimension, value)
+                group['count'] += stats['count']
+                group['burnout'] += stats['burnout']
+                group['probability_sum'] += stats['probability_sum']
+                group['histogram'] += stats['histogram']
+        return self
+
+    def quantile(self, dimension, value, q):
+        """Квантиль вероятности выгорания (с точностью до корзины)"""
+        group = self.groups[dimension][value]
+        if group['count'] == 0:
+            return None
+        cumulative = np.cumsum(group['histogram'])
+        index = int(np.searchsorted(cumulative, q * group['count']))
+        return min(index + 1, self.bins) / self.bins
+
+    def summary(self):
+        """Сводка: доля выгорания, средняя вероятность и квантили по группам"""
+        report = {}
+        for dimension, groups in self.groups.items():
+            report[dimension] = {}
+            for value, stats in groups.items():
+                count = stats['count']
+                report[dimension][value] = {
+                    'count': count,
+                    'burnout': stats['burnout'],
+                    'burnout_rate': stats['burnout'] / count if count else 0.0,
+                    'mean_probability': stats['probability_sum'] / count if count else 0.0,
+                    'p50': self.quantile(dimension, value, 0.5),
+                    'p90': self.quantile(dimension, value, 0.9)
+                }
+        return report
+
+    @property
+    def total(self):
+        group = self.groups.get(TOTAL_DIMENSION, {}).get(TOTAL_GROUP)
+        return {'count': group['count'], 'burnout': group['burnout']} if group else {'count': 0, 'burnout': 0}
+
+    def print_report(self, top=5):
+        """Вывод разбивки по группам (группы с наибольшей долей выгорания)"""
+        report = self.summary()
+        for dimension, groups in report.items():
+            if dimension == TOTAL_DIMENSION:
+                continue
+            print(f"\n📊 {dimension}:")
+            ranked = sorted(groups.items(), key=lambda item: (-item[1]['burnout_rate'], -item[1]['count']))
+            for value, stats in ranked[:top]:
+                print(f"   {value}: {stats['burnout']}/{stats['count']} "
+                      f"({stats['burnout_rate']:.1%}), средняя вероятность {stats['mean_probability']:.1%}, "
+                      f"p90 {stats['p90']:.2f}")
+
+    def to_dict(self):
+        return {
+            'bins': self.bins,
+            'group_fields': self.group_fields,
+            'flag_groups': self.flag_groups,
+            'groups': {
+                dimension: {
+                    value: dict(stats, histogram=stats['histogram'].tolist())
+                    for value, stats in groups.items()
+                }
+                for dimension, groups in self.groups.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregator = cls(group_fields=data['group_fields'], bins=data['bins'],
+                         flag_groups=data.get('flag_groups'))
+        for dimension, groups in data['groups'].items():
+            for value, stats in groups.items():
+                aggregator.groups.setdefault(dimension, {})[value] = dict(
+                    stats, histogram=np.asarray(stats['histogram'], dtype=np.int64)
+                )
+        return aggregator
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"💾 Агрегаты сохранены в {path}")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def main():
+    """Объединение агрегатов шардов и вывод отчета"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Объединение агрегатов прогнозов по шардам')
+    parser.add_argument('summaries', nargs='+', help='Файлы агрегатов шардов')
+    parser.add_argument('--output', '-o', default=None, help='Куда сохранить объединенные агрегаты')
+    args = parser.parse_args()
+
+    aggregator = RiskAggregator.load(args.summaries[0])
+    for path in args.summaries[1:]:
+        aggregator.merge(RiskAggregator.load(path))
+
+    total = aggregator.total
+    print(f"📈 Всего сотрудников: {total['count']}, с выгоранием: {total['burnout']}")
+    aggregator.print_report()
+    if args.output:
+        aggregator.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# score_store.py
+"""Материализованные прогнозы по всему обработанному датасету.
+
+Прогнозы хранятся в индексе сотрудников рядом с записями; обновление
+пересчитывает только строки с измененными признаками или устаревшей
+версией модели, чтение - поиск по ключу без вызова модели.
+"""
+from json_predictor import JSONPredictor
+from project_paths import import_data_manager
+
+
+def refresh(predictor, batch_size=1024, full=False):
+    """Пересчет устаревших прогнозов текущей моделью предсказателя"""
+    DataManager, _ = import_data_manager()
+    return DataManager.refresh_predictions(
+        predictor.score_processed_records, predictor.model_version,
+        batch_size=batch_size, full=full
+    )
+
+
+def main():
+    """Обновление и чтение материализованных прогнозов"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Материализованные прогнозы выгорания')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    refresh_parser = subparsers.add_parser('refresh', help='Пересчитать устаревшие прогнозы')
+    refresh_parser.add_argument('--model', '-m', default='svm_model.pkl', help='Путь к файлу модели')
+    refresh_parser.add_argument('--registry', '-r', default=None,
+                                help='Каталог реестра моделей (вместо --model)')
+    refresh_parser.add_argument('--batch-size', type=int, default=1024,
+                                help='Размер батча для предсказания')
+    refresh_parser.add_argument('--full', action='store_true',
+                                help='Пересчитать все прогнозы, а не только устаревшие')
+
+    show_parser = subparsers.add_parser('show', help='Показать прогноз сотрудника')
+    show_parser.add_argument('key', help='Ключ сотрудника (employee_id)')
+
+    args = parser.parse_args()
+
+    if args.command == 'refresh':
+        predictor = JSONPredictor(args.model, registry_dir=args.registry)
+        if predictor.model is None:
+            return
+        counts = refresh(predictor, batch_size=args.batch_size, full=args.full)
+        if counts:
+            print(f"📈 Сотрудников: {counts['employees']}, с прогнозом: {counts['scored']}, "
+                  f"модель: {predictor.model_version}")
+    elif args.command == 'show':
+        DataManager, _ = import_data_manager()
+        prediction = DataManager.get_prediction(args.key)
+        if prediction is None:
+            print(f"❌ Прогноз для '{args.key}' не найден")
+            return
+        print(json.dumps(prediction, ensure_ascii=False, indent=2))
+        if not prediction['features_current']:
+            print("⚠️  Признаки сотрудника изменились после расчета, выполните refresh")
+
+
+if __name__ == "__main__":
+    main()
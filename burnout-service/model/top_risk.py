@@ -0,0 +1,170 @@
+# top_risk.py
+import heapq
+import json
+
+from risk_aggregator import TOTAL_GROUP
+
+
+class _HeapItem:
+    """Элемент кучи: меньший - первый кандидат на вытеснение.
+
+    При равной вероятности вытесняется больший employee_id, затем
+    более поздний индекс, поэтому результат не зависит от порядка
+    батчей и шардов.
+    """
+    __slots__ = ('entry', 'key')
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.key = (entry['burnout_probability'], str(entry['employee_id']), entry['index'])
+
+    def __lt__(self, other):
+        if self.key[0] != other.key[0]:
+            return self.key[0] < other.key[0]
+        return self.key[1:] > other.key[1:]
+
+
+class TopRisk:
+    """K сотрудников с наибольшим риском выгорания (общий или по группам).
+
+    Для каждой группы хранится куча не больше K элементов, поэтому память
+    O(K × число групп) независимо от размера входа; кучи шардов
+    объединяются точно.
+    """
+
+    def __init__(self, k=10, group_field=None, interpret=None):
+        self.k = k
+        self.group_field = group_field
+        self.interpret = interpret
+        self.heaps = {}
+
+    def _group_value(self, employee):
+        if self.group_field is None:
+            return TOTAL_GROUP
+        return str(employee.get(self.group_field, 'не указано')).strip()
+
+    def _push(self, group, entry):
+        heap = self.heaps.setdefault(group, [])
+        item = _HeapItem(entry)
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+        elif heap[0] < item:
+            heapq.heapreplace(heap, item)
+
+    def _threshold(self, group):
+        """Граница входа в кучу группы (None, пока куча не заполнена)"""
+        heap = self.heaps.get(group)
+        return heap[0].key[0] if heap and len(heap) >= self.k else None
+
+    def candidates(self, employees, probabilities):
+        """Строки батча, которые могут войти в top-K (по границам до учета батча)"""
+        rows = []
+        for row, employee in enumerate(employees):
+            threshold = self._threshold(self._group_value(employee))
+            if threshold is None or float(probabilities[row]) >= threshold:
+                rows.append(row)
+        return rows
+
+    def update(self, employees, employee_ids, indices, batch_result, top_factors=None):
+        """Учет батча: исходные записи, идентификаторы, номера во входе и результат predict_batch.
+
+        top_factors - главные факторы риска по номеру строки батча
+        (достаточно строк из candidates).
+        """
+        probabilities = batch_result['burnout_probability']
+        for row, employee in enumerate(employees):
+            probability = float(probabilities[row])
+            group = self._group_value(employee)
+            threshold = self._threshold(group)
+            if threshold is not None and probability < threshold:
+                continue
+
+            entry = {
+                'employee_id': employee_ids[row],
+                'index': int(indices[row]),
+                'group': group,
+                'prediction': int(batch_result['prediction'][row]),
+                'burnout_probability': probability,
+                'confidence': float(batch_result['confidence'][row])
+            }
+            if 'probability_source' in batch_result:
+                entry['probability_source'] = str(batch_result['probability_source'][row])
+            if top_factors is not None and row in top_factors:
+                entry['top_factors'] = top_factors[row]
+            if self.interpret is not None:
+                interpretation = self.interpret(entry)
+                entry['status'] = interpretation['status']
+                entry['recommendation'] = interpretation['recommendation']
+            self._push(group, entry)
+        return self
+
+    def merge(self, other):
+        """Точное объединение с кучами другого шарда"""
+        if other.k != self.k or other.group_field != self.group_field:
+            raise ValueError("Нельзя объединить top-K с разными K или полем группировки")
+        for group, heap in other.heaps.items():
+            for item in heap:
+                self._push(group, item.entry)
+        return self
+
+    def ranked(self):
+        """Списки по группам в порядке убывания риска"""
+        return {
+            group: [
+                dict(item.entry, rank=rank)
+                for rank, item in enumerate(sorted(heap, reverse=True), start=1)
+            ]
+            for group, heap in sorted(self.heaps.items())
+        }
+
+    def print_report(self):
+        for group, entries in self.ranked().items():
+            title = f"{self.group_field}: {group}" if self.group_field else f"Топ-{self.k}"
+            print(f"\n🔥 {title}")
+            for entry in entries:
+                print(f"   {entry['rank']}. {entry['employee_id']} - {entry['burnout_probability']:.1%}"
+                      + (f" ({entry['status']})" if 'status' in entry else ''))
+
+    def to_dict(self):
+        return {'k': self.k, 'group_field': self.group_field, 'groups': self.ranked()}
+
+    @classmethod
+    def from_dict(cls, data):
+        top = cls(k=data['k'], group_field=data['group_field'])
+        for group, entries in data['groups'].items():
+            for entry in entries:
+                entry = {key: value for key, value in entry.items() if key != 'rank'}
+                top._push(group, entry)
+        return top
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"💾 Top-{self.k} сохранен в {path}")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def main():
+    """Объединение top-K шардов"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Объединение top-K сотрудников с наибольшим риском по шардам')
+    parser.add_argument('shards', nargs='+', help='Файлы top-K шардов')
+    parser.add_argument('--output', '-o', default=None, help='Куда сохранить объединенный top-K')
+    args = parser.parse_args()
+
+    top = TopRisk.load(args.shards[0])
+    for path in args.shards[1:]:
+        top.merge(TopRisk.load(path))
+
+    top.print_report()
+    if args.output:
+        top.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
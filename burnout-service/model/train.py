@@ -0,0 +1,515 @@
+# train.py
+import json
+import time
+from datetime import datetime
+from itertools import product
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.kernel_approximation import RBFSampler
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, pairwise_kernels, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from cascade import ScreenCascade
+from data_loader import DataLoader
+from drift_monitor import ReferenceProfile
+from project_paths import import_data_manager
+
+ARTIFACT_FORMAT_VERSION = 1
+
+DEFAULT_PARAM_GRID = {
+    'kernel': ['linear', 'rbf', 'poly'],
+    'C': [0.01, 0.1, 1.0, 10.0],
+    'gamma': ['scale', 0.01, 0.1],
+    'degree': [2, 3]
+}
+
+# Какие параметры влияют на матрицу ядра (остальное - только C)
+KERNEL_PARAMS = {
+    'linear': (),
+    'rbf': ('gamma',),
+    'poly': ('gamma', 'degree'),
+    'sigmoid': ('gamma',)
+}
+
+
+def expand_grid(param_grid):
+    """Кандидаты, сгруппированные по ядру: C перебирается на общей матрице ядра"""
+    groups = {}
+    for kernel in param_grid['kernel']:
+        names = KERNEL_PARAMS[kernel]
+        for values in product(*(param_grid[name] for name in names)):
+            kernel_params = dict(zip(names, values), kernel=kernel)
+            key = json.dumps(kernel_params, sort_keys=True)
+            groups[key] = {'kernel_params': kernel_params, 'C': list(param_grid['C'])}
+    return list(groups.values())
+
+
+def scale_folds(X, y, n_splits, random_state=42):
+    """Масштабированные фолды: scaler обучается только на train части фолда"""
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    folds = []
+    for train_idx, val_idx in splitter.split(X, y):
+        scaler = StandardScaler().fit(X[train_idx])
+        folds.append({
+            'X_train': scaler.transform(X[train_idx]),
+            'X_val': scaler.transform(X[val_idx]),
+            'y_train': y[train_idx],
+            'y_val': y[val_idx]
+        })
+    return folds
+
+
+def _kernel_matrices(fold, kernel_params):
+    """Матрицы ядра train×train и val×train для фолда"""
+    params = dict(kernel_params)
+    kernel = params.pop('kernel')
+    if params.get('gamma') == 'scale':
+        # Так же, как SVC(gamma='scale')
+        params['gamma'] = 1.0 / (fold['X_train'].shape[1] * fold['X_train'].var())
+    if kernel == 'poly':
+        params.setdefault('coef0', 0.0)
+    K_train = pairwise_kernels(fold['X_train'], metric=kernel, **params)
+    K_val = pairwise_kernels(fold['X_val'], fold['X_train'], metric=kernel, **params)
+    return K_train, K_val
+
+
+def evaluate_group(fold, fold_index, group):
+    """Оценка всех C группы на одном фолде с одной матрицей ядра"""
+    start = time.perf_counter()
+    K_train, K_val = _kernel_matrices(fold, group['kernel_params'])
+    kernel_time = time.perf_counter() - start
+
+    scores = []
+    for C in group['C']:
+        fit_start = time.perf_counter()
+        model = SVC(kernel='precomputed', C=C).fit(K_train, fold['y_train'])
+        decision = model.decision_function(K_val)
+        if len(np.unique(fold['y_val'])) > 1:
+            score = roc_auc_score(fold['y_val'], decision)
+        else:
+            score = accuracy_score(fold['y_val'], model.predict(K_val))
+        scores.append({'C': C, 'score': float(score), 'fit_time': time.perf_counter() - fit_start})
+
+    return {'fold': fold_index, 'kernel_time': kernel_time, 'scores': scores}
+
+
+class SVMTrainer:
+    """Воспроизводимый подбор гиперпараметров SVM с кросс-валидацией"""
+
+    def __init__(self, param_grid=None, cv=5, n_jobs=-1, min_folds=2,
+                 prune_margin=0.1, random_state=42, cache_dir=None):
+        self.param_grid = param_grid or DEFAULT_PARAM_GRID
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.min_folds = min_folds
+        self.prune_margin = prune_margin
+        self.random_state = random_state
+        self.memory = joblib.Memory(cache_dir, verbose=0)
+        self.cv_results = []
+
+    def search(self, X, y):
+        """Перебор кандидатов по фолдам с отсечением явно проигрывающих"""
+        n_splits = max(2, min(self.cv, int(np.bincount(y).min())))
+        folds = self.memory.cache(scale_folds)(X, y, n_splits, self.random_state)
+
+        groups = expand_grid(self.param_grid)
+        candidates = {}
+        for group_index, group in enumerate(groups):
+            for C in group['C']:
+                candidates[(group_index, C)] = {
+                    'params': dict(group['kernel_params'], C=C),
+                    'fold_scores': [], 'fold_times': [], 'pruned_after': None
+                }
+
+        fold_times = [0.0] * n_splits
+        active_groups = set(range(len(groups)))
+        fold_rounds = [list(range(min(self.min_folds, n_splits)))] + [
+            [fold_index] for fold_index in range(min(self.min_folds, n_splits), n_splits)
+        ]
+
+        with Parallel(n_jobs=self.n_jobs) as parallel:
+            for fold_indices in fold_rounds:
+                tasks = [
+                    (group_index, fold_index)
+                    for group_index in sorted(active_groups) for fold_index in fold_indices
+                ]
+                outputs = parallel(
+                    delayed(evaluate_group)(
+                        folds[fold_index], fold_index,
+                        self._active_group(groups, candidates, group_index)
+                    )
+                    for group_index, fold_index in tasks
+                )
+
+                for (group_index, fold_index), output in zip(tasks, outputs):
+                    n_scores = len(output['scores'])
+                    fold_times[fold_index] += output['kernel_time']
+                    for item in output['scores']:
+                        # Время вычисления ядра делится между кандидатами группы
+                        elapsed = item['fit_time'] + output['kernel_time'] / n_scores
+                        candidate = candidates[(group_index, item['C'])]
+                        candidate['fold_scores'].append(item['score'])
+                        candidate['fold_times'].append(elapsed)
+                        fold_times[fold_index] += item['fit_time']
+
+                self._prune(candidates, fold_indices[-1] + 1)
+                active_groups = {
+                    group_index for (group_index, _), candidate in candidates.items()
+                    if candidate['pruned_after'] is None
+                }
+
+        self.cv_results = [
+            {
+                'params': candidate['params'],
+                'mean_score': float(np.mean(candidate['fold_scores'])),
+                'fold_scores': candidate['fold_scores'],
+                'fold_times': candidate['fold_times'],
+                'total_time': float(np.sum(candidate['fold_times'])),
+                'pruned_after': candidate['pruned_after']
+            }
+            for candidate in candidates.values()
+        ]
+        self.fold_times = fold_times
+        self.n_splits = n_splits
+        return self._best()
+
+    @staticmethod
+    def _active_group(groups, candidates, group_index):
+        group = groups[group_index]
+        return {
+            'kernel_params': group['kernel_params'],
+            'C': [C for C in group['C'] if candidates[(group_index, C)]['pruned_after'] is None]
+        }
+
+    def _prune(self, candidates, folds_done):
+        """Ранняя остановка: кандидаты хуже лучшего более чем на prune_margin"""
+        active = [c for c in candidates.values() if c['pruned_after'] is None]
+        if folds_done < self.min_folds or len(active) < 2:
+            return
+        best = max(np.mean(c['fold_scores']) for c in active)
+        for candidate in active:
+            if np.mean(candidate['fold_scores']) < best - self.prune_margin:
+                candidate['pruned_after'] = folds_done
+
+    def _best(self):
+        complete = [r for r in self.cv_results if r['pruned_after'] is None]
+        return max(complete, key=lambda r: (r['mean_score'], -r['total_time']))
+
+    def report(self):
+        """Время по кандидатам и по фолдам"""
+        print("\n⏱️  КАНДИДАТЫ (по убыванию качества):")
+        for result in sorted(self.cv_results, key=lambda r: -r['mean_score']):
+            status = f"отсечен после {result['pruned_after']} фолдов" if result['pruned_after'] else "все фолды"
+            print(f"   {result['mean_score']:.4f}  {result['total_time'] * 1000:8.1f} мс  "
+                  f"{result['params']}  ({status})")
+        print("\n⏱️  ФОЛДЫ:")
+        for fold_index, elapsed in enumerate(self.fold_times):
+            print(f"   Фолд {fold_index + 1}: {elapsed * 1000:.1f} мс")
+
+    def _out_of_fold(self, X, y, params):
+        """Вероятности скрининга и прогнозы SVM вне фолдов (те же фолды, что при подборе)"""
+        folds = self.memory.cache(scale_folds)(X, y, self.n_splits, self.random_state)
+        probability, prediction = [], []
+        for fold in folds:
+            screen = ScreenCascade.fit_screen(fold['X_train'], fold['y_train'], self.random_state)
+            model = SVC(random_state=self.random_state, **params).fit(fold['X_train'], fold['y_train'])
+            probability.append(screen.predict_proba(fold['X_val'])[:, 1])
+            prediction.append(model.predict(fold['X_val']))
+        return np.concatenate(probability), np.concatenate(prediction)
+
+    def fit_final(self, X_train, y_train, X_test, y_test, params, cascade_target=0.01):
+        """Обучение итоговой модели и сборка самоописывающего артефакта
+
+        cascade_target - допустимая доля расхождений каскада (скрининг +
+        SVM) с одной SVM; None - без модели-скрининга. Итоговые модели
+        обучаются на всем X_train, поэтому полоса каскада подбирается по
+        прогнозам вне фолдов на X_train: каждая запись оценена скринингом
+        и SVM, обученными без нее.
+        """
+        # scaler обучается на DataFrame, чтобы помнить имена признаков
+        scaler = StandardScaler().fit(X_train)
+        X_train_scaled = scaler.transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+
+        model = SVC(probability=True, random_state=self.random_state, **params)
+        model.fit(X_train_scaled, y_train)
+
+        metrics = {
+            'train_accuracy': float(accuracy_score(y_train, model.predict(X_train_scaled))),
+            'test_accuracy': float(accuracy_score(y_test, model.predict(X_test_scaled))),
+            'cv_score': float(self._best()['mean_score'])
+        }
+        if len(np.unique(y_test)) > 1:
+            metrics['auc'] = float(roc_auc_score(y_test, model.predict_proba(X_test_scaled)[:, 1]))
+
+        cascade = None
+        if cascade_target is not None:
+            probability, svm_prediction = self._out_of_fold(
+                X_train.to_numpy(dtype=float), np.asarray(y_train), params)
+            screen = ScreenCascade.fit_screen(X_train_scaled, y_train, self.random_state)
+            cascade = ScreenCascade.calibrate(screen, probability, svm_prediction,
+                                              cascade_target).to_dict()
+
+        return {
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'created': datetime.now().isoformat(),
+            'model': model,
+            'scaler': scaler,
+            'feature_names': list(X_train.columns),
+            'drift_reference': ReferenceProfile.build(X_train).to_dict(),
+            'cascade': cascade,
+            'best_params': params,
+            'metrics': metrics,
+            'cv_results': self.cv_results,
+            'training': {
+                'n_train': int(len(y_train)),
+                'n_test': int(len(y_test)),
+                'cv_folds': self.n_splits,
+                'random_state': self.random_state
+            }
+        }
+
+
+class IncrementalTrainer:
+    """Обучение вне памяти: данные читаются порциями из DataManager.
+
+    Первый проход обучает scaler через partial_fit, следующие - линейный
+    классификатор (опционально на случайных признаках Фурье, приближающих
+    RBF-ядро). Память ограничена размером порции.
+    """
+
+    def __init__(self, chunk_size=10000, epochs=1, alpha=1e-4,
+                 kernel_components=None, gamma=None, random_state=42):
+        self.chunk_size = chunk_size
+        self.epochs = epochs
+        self.alpha = alpha
+        self.kernel_components = kernel_components
+        self.gamma = gamma
+        self.random_state = random_state
+
+    def _chunks(self, feature_names):
+        """Порции (X, y) с фиксированной схемой признаков"""
+        DataManager, config = import_data_manager()
+        for chunk in DataManager.iter_data_for_ml(self.chunk_size):
+            if config.TARGET_COLUMN not in chunk.columns:
+                continue
+            chunk = chunk[chunk[config.TARGET_COLUMN].notna()]
+            if chunk.empty:
+                continue
+            X = chunk.reindex(columns=feature_names)
+            X = X.apply(pd.to_numeric, errors='coerce').fillna(0.0).astype(float)
+            y = (chunk[config.TARGET_COLUMN].astype(float) >= config.BURNOUT_BINARY_THRESHOLD).astype(int)
+            yield X, y.to_numpy()
+
+    def feature_names_from_summary(self):
+        """Схема признаков из сводки датасета (без чтения данных)"""
+        DataManager, config = import_data_manager()
+        info = DataManager.get_dataset_info()
+        if info is None or not info['has_target']:
+            return None
+        excluded = {config.TARGET_COLUMN, config.ID_COLUMN, *config.EXPLICIT_ID_FIELDS}
+        return [col for col in info['numeric_stats'] if col not in excluded]
+
+    def fit(self, feature_names):
+        start = time.perf_counter()
+
+        # Проход 1: статистики масштабирования
+        # и эталонные гистограммы для мониторинга дрейфа
+        scaler = StandardScaler()
+        reference = None
+        n_samples = 0
+        for X, _ in self._chunks(feature_names):
+            scaler.partial_fit(X)
+            reference = ReferenceProfile.build(X) if reference is None else reference.add(X)
+            n_samples += len(X)
+        if n_samples == 0:
+            raise ValueError("Нет размеченных записей для обучения")
+
+        sampler = None
+        if self.kernel_components:
+            # Случайные признаки не зависят от данных - хватает числа признаков
+            sampler = RBFSampler(
+                gamma=self.gamma or 1.0 / len(feature_names),
+                n_components=self.kernel_components,
+                random_state=self.random_state
+            ).fit(np.zeros((1, len(feature_names))))
+
+        classifier = SGDClassifier(loss='log_loss', alpha=self.alpha, random_state=self.random_state)
+
+        # Проходы 2+: классификатор; на первой эпохе - прогрессивная
+        # валидация (оценка порции до обучения на ней): в следующих эпохах
+        # модель уже видела все порции
+        correct = evaluated = 0
+        for epoch in range(self.epochs):
+            for X, y in self._chunks(feature_names):
+                features = scaler.transform(X)
+                if sampler is not None:
+                    features = sampler.transform(features)
+                if epoch == 0 and hasattr(classifier, 'coef_'):
+                    correct += int((classifier.predict(features) == y).sum())
+                    evaluated += len(y)
+                classifier.partial_fit(features, y, classes=np.array([0, 1]))
+
+        model = classifier if sampler is None else Pipeline([
+            ('features', sampler), ('classifier', classifier)
+        ])
+
+        return {
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'created': datetime.now().isoformat(),
+            'model': model,
+            'scaler': scaler,
+            'feature_names': list(feature_names),
+            'drift_reference': reference.to_dict(),
+            'best_params': {
+                'mode': 'incremental',
+                'alpha': self.alpha,
+                'kernel_components': self.kernel_components,
+                'gamma': sampler.gamma if sampler is not None else None
+            },
+            'metrics': {
+                'progressive_accuracy': correct / evaluated if evaluated else None
+            },
+            'training': {
+                'mode': 'incremental',
+                'n_train': n_samples,
+                'chunk_size': self.chunk_size,
+                'epochs': self.epochs,
+                'random_state': self.random_state,
+                'train_time': time.perf_counter() - start
+            }
+        }
+
+
+def train_incremental(args):
+    """Обучение по обработанному датасету порциями"""
+    trainer = IncrementalTrainer(
+        chunk_size=args.chunk_size, epochs=args.epochs, alpha=args.alpha,
+        kernel_components=args.kernel_components, gamma=args.gamma
+    )
+
+    feature_names = trainer.feature_names_from_summary()
+    if args.features_from_splits or not feature_names:
+        splits = DataLoader.load_splits()
+        if splits is None:
+            return None
+        feature_names = list(splits[0].columns)
+
+    print(f"🧮 Потоковое обучение: {len(feature_names)} признаков, порции по {args.chunk_size}")
+    try:
+        artifact = trainer.fit(feature_names)
+    except ValueError as e:
+        print(f"❌ Ошибка потокового обучения: {e}")
+        return None
+    print(f"   Записей: {artifact['training']['n_train']}, "
+          f"время: {artifact['training']['train_time']:.2f} с")
+    return artifact
+
+
+def main():
+    """Обучение SVM по готовым train/val/test наборам"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Обучение модели выгорания')
+    parser.add_argument('--output', '-o', default='svm_model.pkl', help='Путь для сохранения модели')
+    parser.add_argument('--cv', type=int, default=5, help='Число фолдов кросс-валидации')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Число процессов (-1 - все ядра)')
+    parser.add_argument('--min-folds', type=int, default=2,
+                        help='Сколько фолдов оценивать до отсечения кандидатов')
+    parser.add_argument('--prune-margin', type=float, default=0.1,
+                        help='Отсекать кандидатов хуже лучшего на эту величину')
+    parser.add_argument('--grid', default=None, help='JSON файл с сеткой гиперпараметров')
+    parser.add_argument('--cache-dir', default=None, help='Каталог кеша масштабированных фолдов')
+    parser.add_argument('--cascade-target', type=float, default=0.01, metavar='RATE',
+                        help='Допустимая доля расхождений каскадной оценки с SVM (вне фолдов)')
+    parser.add_argument('--no-cascade', action='store_true',
+                        help='Не обучать модель-скрининг для каскадной оценки')
+    parser.add_argument('--register', default=None, metavar='REGISTRY',
+                        help='Зарегистрировать модель в реестре')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Потоковое обучение по обработанному датасету (без kernel SVM)')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Размер порции (--incremental)')
+    parser.add_argument('--epochs', type=int, default=1, help='Число эпох (--incremental)')
+    parser.add_argument('--alpha', type=float, default=1e-4, help='Регуляризация (--incremental)')
+    parser.add_argument('--kernel-components', type=int, default=None,
+                        help='Число случайных признаков для приближения RBF-ядра (--incremental)')
+    parser.add_argument('--gamma', type=float, default=None, help='gamma RBF-ядра (--incremental)')
+    parser.add_argument('--features-from-splits', action='store_true',
+                        help='Взять схему признаков из X_train.csv (--incremental)')
+    args = parser.parse_args()
+
+    if args.incremental:
+        artifact = train_incremental(args)
+        if artifact is None:
+            return
+        joblib.dump(artifact, args.output)
+        print(f"💾 Модель сохранена в {args.output}")
+        print(f"   Метрики: {artifact['metrics']}")
+        if args.register:
+            from model_registry import ModelRegistry
+            ModelRegistry(args.register).register(args.output)
+        return
+
+    splits = DataLoader.load_splits()
+    if splits is None:
+        return
+    X_train, X_val, X_test, y_train, y_val, y_test = splits
+
+    # Подбор на train+val, итоговая проверка на test
+    X_search = pd.concat([X_train, X_val], ignore_index=True)
+    y_search = pd.concat([y_train, y_val], ignore_index=True)
+
+    param_grid = None
+    if args.grid:
+        with open(args.grid, 'r', encoding='utf-8') as f:
+            param_grid = json.load(f)
+
+    trainer = SVMTrainer(param_grid=param_grid, cv=args.cv, n_jobs=args.n_jobs,
+                         min_folds=args.min_folds, prune_margin=args.prune_margin,
+                         cache_dir=args.cache_dir)
+
+    start = time.perf_counter()
+    best = trainer.search(X_search.to_numpy(dtype=float), y_search.to_numpy(dtype=int))
+    search_time = time.perf_counter() - start
+
+    trainer.report()
+    print(f"\n🏆 Лучшие параметры: {best['params']} (CV: {best['mean_score']:.4f})")
+    print(f"   Время подбора: {search_time:.2f} с")
+
+    artifact = trainer.fit_final(
+        X_search.astype(float), y_search.to_numpy(dtype=int),
+        X_test.astype(float), y_test.to_numpy(dtype=int),
+        best['params'], cascade_target=None if args.no_cascade else args.cascade_target
+    )
+    artifact['training']['search_time'] = search_time
+
+    joblib.dump(artifact, args.output)
+    print(f"💾 Модель сохранена в {args.output}")
+    print(f"   Метрики: {artifact['metrics']}")
+    if artifact['cascade']:
+        calibration = artifact['cascade']['calibration']
+        if not calibration['sufficient_sample']:
+            print(f"⚠️  Каскад: {calibration['n_calibration']} записей вне фолдов мало, чтобы подтвердить "
+                  f"расхождение с SVM не выше {calibration['target_disagreement']:.2%} - полоса пуста, "
+                  f"все записи оцениваются SVM")
+        else:
+            print(f"⚡ Каскад: полоса SVM [{artifact['cascade']['low']:.3f}, {artifact['cascade']['high']:.3f}], "
+                  f"без SVM {calibration['short_circuit_rate']:.1%} из {calibration['n_calibration']} записей вне фолдов, "
+                  f"расхождение с SVM {calibration['disagreement']:.2%} "
+                  f"(верхняя граница {calibration['disagreement_upper_bound']:.2%}, "
+                  f"допустимо {calibration['target_disagreement']:.2%})")
+
+    if args.register:
+        from model_registry import ModelRegistry
+        ModelRegistry(args.register).register(args.output)
+
+
+if __name__ == "__main__":
+    main()
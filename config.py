@@ -7,19 +7,39 @@ DATA_DIR = PROJECT_ROOT / "data"
 RAW_DATA_PATH = DATA_DIR / "data_raw.xlsx"
 PROCESSED_DIR = DATA_DIR / "processed"
 
-# Создаем директории
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-
 # Имена выходных файлов
 PROCESSED_JSON = PROCESSED_DIR / "dataset.json"
 PROCESSED_CSV = PROCESSED_DIR / "dataset.csv"
 FEATURES_CSV = PROCESSED_DIR / "features.csv"
+SUMMARY_JSON = PROCESSED_DIR / "dataset_summary.json"
+EMPLOYEE_STORE = PROCESSED_DIR / "employees.sqlite"
+
+# Кэш промежуточных результатов стадий DataProcessor (pickle, вытеснение по размеру)
+STAGE_CACHE_DIR = PROCESSED_DIR / "stage_cache"
+STAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def ensure_dirs():
+    """Создание директорий для выходных файлов (по требованию, не при импорте)"""
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
 # Настройки обработки данных
 CURRENT_DATE = "2025-12-01"
+# Месяцы KPI по умолчанию; в данных месячные столбцы определяются по названию
+# (kpi_history.kpi_columns), поэтому ряд может быть любой длины
 KPI_COLUMNS = ['июнь', 'июль', 'август', 'сентябрь', 'октябрь']
+# Окна статистик KPI в месяцах: None - вся история (признаки без суффикса),
+# для окна W признаки получают суффикс _Wм (например, KPI_тренд_3м)
+KPI_WINDOWS = [None]
 TARGET_COLUMN = "Состояние выгорания"
 
+# Категориальные столбцы с One-Hot кодированием (префикс = имя столбца)
+ONE_HOT_COLUMNS = ['Город', 'Должность']
+
+# Идентификация сотрудника
+ID_COLUMN = "employee_id"
+EXPLICIT_ID_FIELDS = ['ID', 'Табельный номер']
+EMPLOYEE_KEY_FIELDS = ['ФИО', 'юр.лицо']
+
 # Маппинги для кодирования
 BINARY_MAPPING = {
     'да': 1, 'нет': 0, 
@@ -31,4 +51,7 @@ BURNOUT_MAPPING = {
     'все хорошо': 0, 
     'усталость': 1, 
     'выгорел': 2
-}
\ No newline at end of file
+}
+
+# Уровень целевой переменной, начиная с которого класс модели = 1 (выгорание)
+BURNOUT_BINARY_THRESHOLD = 1
\ No newline at end of file
@@ -1,13 +1,22 @@
 # data_manager.py
-import pandas as pd
 import json
 from datetime import datetime
 from config import *
+# pandas импортируется внутри методов: запросы к сводке и индексу обходятся без него
+from dataset_summary import DatasetSummary
+from employee_store import EmployeeStore, employee_key, features_hash
 
 class DataManager:
     @staticmethod
     def save_processed_data(df):
         """Сохранение обработанных данных в разных форматах"""
+        ensure_dirs()
+        
+        # Один сотрудник - одна (последняя) запись
+        if ID_COLUMN not in df.columns:
+            df = df.copy()
+            df[ID_COLUMN] = [employee_key(record) for record in df.to_dict('records')]
+        df = df.drop_duplicates(subset=[ID_COLUMN], keep='last')
         
         # Проверяем наличие целевой переменной
         has_target = TARGET_COLUMN in df.columns
@@ -15,14 +24,10 @@ class DataManager:
         # Сохраняем CSV для ML
         df.to_csv(PROCESSED_CSV, index=False, encoding='utf-8')
         
-        # Сохраняем отдельно признаки (если есть целевая переменная)
-        if has_target:
-            features_df = df.drop(columns=[TARGET_COLUMN])
-            features_df.to_csv(FEATURES_CSV, index=False, encoding='utf-8')
-        else:
-            # Если целевой переменной нет, то все столбцы - это признаки
-            features_df = df.copy()
-            features_df.to_csv(FEATURES_CSV, index=False, encoding='utf-8')
+        # Сохраняем отдельно признаки (без целевой переменной и идентификатора)
+        features_df = df.drop(columns=[TARGET_COLUMN, ID_COLUMN], errors='ignore')
+        features_df.to_csv(FEATURES_CSV, index=False, encoding='utf-8')
+        if not has_target:
             print(f"Внимание: целевая переменная '{TARGET_COLUMN}' отсутствует в данных")
         
         # Сохраняем JSON для удобства работы
@@ -35,6 +40,7 @@ class DataManager:
                 'columns': list(df.columns),
                 'has_target': has_target,
                 'target_column': TARGET_COLUMN if has_target else None,
+                'id_column': ID_COLUMN,
                 'feature_columns': list(features_df.columns)
             },
             'records': records
@@ -43,129 +49,341 @@ class DataManager:
         with open(PROCESSED_JSON, 'w', encoding='utf-8') as f:
             json.dump(data_structure, f, ensure_ascii=False, indent=2)
         
+        # Индекс по сотрудникам
+        with EmployeeStore() as store:
+            store.replace_all(records)
+        
+        # Сводка для быстрых запросов информации о датасете
+        DatasetSummary.from_dataframe(df, data_structure['metadata']).save()
+        
         print(f"Данные сохранены:")
         print(f"  - JSON: {PROCESSED_JSON} ({len(records)} записей)")
         print(f"  - CSV: {PROCESSED_CSV}")
         print(f"  - Features: {FEATURES_CSV}")
+        print(f"  - Индекс сотрудников: {EMPLOYEE_STORE}")
         if not has_target:
             print(f"  ⚠️  Целевая переменная '{TARGET_COLUMN}' отсутствует!")
         
         return data_structure
     
     @staticmethod
-    def add_new_records(new_records):
-        """Добавление новых записей в JSON и обновление CSV"""
+    def _open_store():
+        """Открытие индекса сотрудников (создается из JSON при первом обращении)"""
+        if EMPLOYEE_STORE.exists():
+            return EmployeeStore()
+        
         try:
             with open(PROCESSED_JSON, 'r', encoding='utf-8') as f:
                 data = json.load(f)
+        except FileNotFoundError:
+            return None
+        
+        store = EmployeeStore()
+        store.replace_all(data['records'])
+        return store
+    
+    @staticmethod
+    def export_from_store(store, summary=None):
+        """Перезапись JSON/CSV выгрузок из индекса (последние версии сотрудников)"""
+        import pandas as pd
+        
+        records = [record for chunk in store.iter_records() for record in chunk]
+        df = pd.DataFrame(records)
+        has_target = TARGET_COLUMN in df.columns
+        
+        previous = summary.metadata if summary is not None else {}
+        features_df = df.drop(columns=[TARGET_COLUMN, ID_COLUMN], errors='ignore')
+        data = {
+            'metadata': {
+                'created': previous.get('created', datetime.now().isoformat()),
+                'last_updated': datetime.now().isoformat(),
+                'total_records': len(records),
+                'columns': list(df.columns),
+                'has_target': has_target,
+                'target_column': TARGET_COLUMN if has_target else None,
+                'id_column': ID_COLUMN,
+                'feature_columns': list(features_df.columns)
+            },
+            'records': records
+        }
+        
+        with open(PROCESSED_JSON, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        df.to_csv(PROCESSED_CSV, index=False)
+        features_df.to_csv(FEATURES_CSV, index=False)
+        
+        if summary is not None:
+            summary.metadata = data['metadata']
+            summary.save()
+        
+        return data
+    
+    @staticmethod
+    def _store_summary(store):
+        """Сводка датасета; если ее нет - пересчет по индексу"""
+        import pandas as pd
+        
+        summary = DataManager._load_summary()
+        if summary is None:
+            records = [record for chunk in store.iter_records() for record in chunk]
+            summary = DatasetSummary.from_dataframe(pd.DataFrame(records))
+        return summary
+    
+    @staticmethod
+    def add_new_records(new_records, export=False):
+        """Добавление новых записей с заменой уже известных сотрудников (upsert).
+        
+        Обновляются только индекс и сводка; загрузчики для ML читают индекс.
+        export=True дополнительно переписывает JSON/CSV выгрузки целиком
+        (то же делает export_from_store).
+        """
+        store = DataManager._open_store()
+        if store is None:
+            print("Файл с обработанными данными не найден. Сначала выполните обработку данных.")
+            return None
+        
+        with store:
+            summary = DataManager._store_summary(store)
             
-            # Добавляем новые записи
-            data['records'].extend(new_records)
-            
-            # Обновляем метаданные
-            data['metadata']['total_records'] = len(data['records'])
-            data['metadata']['last_updated'] = datetime.now().isoformat()
-            
-            # Сохраняем обновленный JSON
-            with open(PROCESSED_JSON, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
-            # Обновляем CSV файлы
-            updated_df = pd.DataFrame(data['records'])
-            updated_df.to_csv(PROCESSED_CSV, index=False)
+            def update_summary(records, replaced):
+                # Обновляем сводку только по затронутым записям; при ошибке
+                # транзакция индекса откатывается, и сводка с ним не расходится
+                summary.remove_records(replaced)
+                summary.add_records(records)
+                summary.metadata = dict(summary.metadata, last_updated=datetime.now().isoformat(),
+                                        total_records=summary.total_records)
+                summary.save()
             
-            # Сохраняем признаки (с проверкой наличия целевой переменной)
-            if data['metadata']['has_target']:
-                features_df = updated_df.drop(columns=[TARGET_COLUMN])
-            else:
-                features_df = updated_df.copy()
-            features_df.to_csv(FEATURES_CSV, index=False)
+            records, replaced = store.upsert_many(new_records, on_change=update_summary)
             
-            print(f"Добавлено {len(new_records)} новых записей")
-            print(f"Всего записей: {len(data['records'])}")
+            data = DataManager.export_from_store(store, summary) if export else {'metadata': summary.metadata}
+        
+        print(f"Добавлено {len(records) - len(replaced)} новых записей, обновлено {len(replaced)}")
+        print(f"Всего записей: {summary.total_records}")
+        
+        return data
+    
+    @staticmethod
+    def add_kpi_month(month, values, export=False):
+        """Новый месяц KPI для сотрудников: values - {ключ: значение}.
+        
+        Признаки KPI обновляются из сохраненного в индексе состояния,
+        без пересчета всей истории сотрудника.
+        """
+        store = DataManager._open_store()
+        if store is None:
+            print("Файл с обработанными данными не найден. Сначала выполните обработку данных.")
+            return None
+        
+        with store:
+            summary = DataManager._store_summary(store)
+        
+            def update_summary(records, replaced):
+                summary.remove_records(replaced)
+                summary.add_records(records)
+                summary.metadata = dict(summary.metadata, last_updated=datetime.now().isoformat(),
+                                        total_records=summary.total_records)
+                summary.save()
+        
+            try:
+                records, _ = store.add_kpi_month(month, values, on_change=update_summary)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return None
+        
+            data = DataManager.export_from_store(store, summary) if export else {'metadata': summary.metadata}
+        
+        print(f"KPI за '{month}' добавлен для {len(records)} сотрудников")
+        return data
+    
+    @staticmethod
+    def get_employee(key):
+        """Последняя версия записи сотрудника по ключу"""
+        store = DataManager._open_store()
+        if store is None:
+            return None
+        with store:
+            return store.get(key)
+    
+    @staticmethod
+    def get_prediction(key):
+        """Материализованный прогноз сотрудника (без вызова модели)"""
+        store = DataManager._open_store()
+        if store is None:
+            return None
+        with store:
+            return store.get_prediction(key)
+    
+    @staticmethod
+    def refresh_predictions(score_records, model_version, batch_size=1024, full=False):
+        """Пересчет материализованных прогнозов только для устаревших строк.
+        
+        Строка устарела, если изменились признаки сотрудника или версия модели.
+        score_records(records) возвращает для каждой записи кортеж
+        (prediction, burnout_probability, no_burnout_probability, confidence, status).
+        """
+        store = DataManager._open_store()
+        if store is None:
+            print("Файл с обработанными данными не найден.")
+            return None
+        
+        with store:
+            keys = store.keys() if full else store.stale_keys(model_version)
+            for start in range(0, len(keys), batch_size):
+                records = store.get_many(keys[start:start + batch_size])
+                scores = score_records(list(records.values()))
+                # Хеш берется от оцененной версии записи: правка во время
+                # пересчета будет подхвачена следующим обновлением
+                store.save_predictions(
+                    (key, features_hash(record), model_version, *score)
+                    for (key, record), score in zip(records.items(), scores)
+                )
+            counts = store.prediction_counts(model_version)
+        
+        print(f"Пересчитано прогнозов: {len(keys)} из {counts['employees']}")
+        return dict(counts, refreshed=len(keys))
+    
+    @staticmethod
+    def delete_employees(keys, export=False):
+        """Удаление сотрудников по ключам"""
+        store = DataManager._open_store()
+        if store is None:
+            print("Файл с обработанными данными не найден.")
+            return None
+        
+        with store:
+            summary = DataManager._store_summary(store)
             
-            return data
+            def update_summary(removed):
+                summary.remove_records(list(removed.values()))
+                summary.metadata = dict(summary.metadata, last_updated=datetime.now().isoformat(),
+                                        total_records=summary.total_records)
+                summary.save()
             
-        except FileNotFoundError:
-            print("Файл с обработанными данными не найден. Сначала выполните обработку данных.")
+            removed = store.delete_many(keys, on_change=update_summary)
+            if export:
+                DataManager.export_from_store(store, summary)
+        
+        print(f"Удалено {len(removed)} записей")
+        return list(removed)
+    
+    @staticmethod
+    def _load_store_dataframe():
+        """Все последние версии сотрудников из индекса (None, если данных нет)"""
+        import pandas as pd
+        
+        store = DataManager._open_store()
+        if store is None:
             return None
+        with store:
+            return pd.DataFrame([record for chunk in store.iter_records() for record in chunk])
     
     @staticmethod
     def load_data_for_ml():
-        """Загрузка данных для ML (из CSV)"""
-        try:
-            df = pd.read_csv(PROCESSED_CSV)
-            print(f"Загружено {len(df)} записей для ML")
-            
-            # Проверяем наличие целевой переменной
-            if TARGET_COLUMN in df.columns:
-                print(f"Целевая переменная '{TARGET_COLUMN}' присутствует")
-            else:
-                print(f"Целевая переменная '{TARGET_COLUMN}' отсутствует")
-                
-            return df
-        except FileNotFoundError:
+        """Загрузка данных для ML (из индекса сотрудников - актуально и без выгрузки CSV)"""
+        df = DataManager._load_store_dataframe()
+        if df is None:
             print("Файл с обработанными данными не найден. Сначала выполните обработку данных.")
             return None
+        
+        print(f"Загружено {len(df)} записей для ML")
+        
+        # Проверяем наличие целевой переменной
+        if TARGET_COLUMN in df.columns:
+            print(f"Целевая переменная '{TARGET_COLUMN}' присутствует")
+        else:
+            print(f"Целевая переменная '{TARGET_COLUMN}' отсутствует")
+            
+        return df
     
     @staticmethod
-    def load_features_for_ml():
-        """Загрузка только признаков для ML"""
+    def iter_data_for_ml(chunk_size=10000):
+        """Потоковая загрузка данных для ML порциями (память - O(chunk_size))"""
+        import pandas as pd
+        
+        if EMPLOYEE_STORE.exists():
+            with EmployeeStore() as store:
+                for records in store.iter_records(chunk_size):
+                    yield pd.DataFrame(records)
+            return
+        
         try:
-            df = pd.read_csv(FEATURES_CSV)
-            print(f"Загружено {len(df)} записей признаков для ML")
-            return df
+            for chunk in pd.read_csv(PROCESSED_CSV, chunksize=chunk_size):
+                yield chunk
         except FileNotFoundError:
+            print("Файл с обработанными данными не найден. Сначала выполните обработку данных.")
+    
+    @staticmethod
+    def load_features_for_ml():
+        """Загрузка только признаков для ML (из индекса сотрудников)"""
+        df = DataManager._load_store_dataframe()
+        if df is None:
             print("Файл с признаками не найден. Сначала выполните обработку данных.")
             return None
+        
+        df = df.drop(columns=[TARGET_COLUMN, ID_COLUMN], errors='ignore')
+        print(f"Загружено {len(df)} записей признаков для ML")
+        return df
     
     @staticmethod
-    def get_dataset_info():
-        """Получение информации о датасете"""
+    def _load_summary():
+        """Загрузка сводки датасета (None, если ее нет)"""
         try:
-            with open(PROCESSED_JSON, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            df = pd.DataFrame(data['records'])
-            
-            info = {
-                'total_records': len(df),
-                'columns': list(df.columns),
-                'has_target': data['metadata']['has_target'],
-                'metadata': data['metadata']
-            }
-            
-            # Добавляем информацию о целевой переменной, если она есть
-            if info['has_target']:
-                info['target_missing'] = df[TARGET_COLUMN].isna().sum()
-                info['target_distribution'] = df[TARGET_COLUMN].value_counts().to_dict()
-            else:
-                info['target_missing'] = 'N/A'
-                info['target_distribution'] = 'N/A'
-                info['warning'] = f"Целевая переменная '{TARGET_COLUMN}' отсутствует"
-            
-            return info
-        except FileNotFoundError:
+            return DatasetSummary.load()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+    
+    @staticmethod
+    def rebuild_summary():
+        """Полный пересчет сводки по данным (индекс сотрудников - источник истины)"""
+        import pandas as pd
+        
+        store = DataManager._open_store()
+        if store is None:
             print("Файл с обработанными данными не найден.")
             return None
+        
+        previous = DataManager._load_summary()
+        with store:
+            records = [record for chunk in store.iter_records() for record in chunk]
+        metadata = previous.metadata if previous is not None else {}
+        return DatasetSummary.from_dataframe(pd.DataFrame(records), metadata)
+    
+    @staticmethod
+    def get_dataset_info(verify=False):
+        """Получение информации о датасете (из сводки, без чтения данных)"""
+        summary = None if verify else DataManager._load_summary()
+        
+        if summary is None:
+            stored = DataManager._load_summary()
+            summary = DataManager.rebuild_summary()
+            if summary is None:
+                return None
+            
+            if verify and stored is not None:
+                mismatches = stored.diff(summary)
+                if mismatches:
+                    print(f"Сводка датасета расходилась с данными: {mismatches}")
+                else:
+                    print("Сводка датасета совпадает с данными")
+            summary.save()
+        
+        return summary.info()
     
     @staticmethod
     def check_target_presence():
         """Проверка наличия целевой переменной в данных"""
-        try:
-            df = pd.read_csv(PROCESSED_CSV)
-            has_target = TARGET_COLUMN in df.columns
-            
-            if has_target:
-                target_stats = df[TARGET_COLUMN].describe()
-                print(f"Целевая переменная '{TARGET_COLUMN}' присутствует:")
-                print(f"  - Распределение: {df[TARGET_COLUMN].value_counts().to_dict()}")
-                print(f"  - Пропуски: {df[TARGET_COLUMN].isna().sum()}")
-            else:
-                print(f"Целевая переменная '{TARGET_COLUMN}' отсутствует в данных")
-                print(f"Доступные столбцы: {list(df.columns)}")
-            
-            return has_target
-        except FileNotFoundError:
-            print("Файл с обработанными данными не найден.")
-            return False
\ No newline at end of file
+        info = DataManager.get_dataset_info()
+        if info is None:
+            return False
+        
+        has_target = info['has_target']
+        if has_target:
+            print(f"Целевая переменная '{TARGET_COLUMN}' присутствует:")
+            print(f"  - Распределение: {info['target_distribution']}")
+            print(f"  - Пропуски: {info['target_missing']}")
+        else:
+            print(f"Целевая переменная '{TARGET_COLUMN}' отсутствует в данных")
+            print(f"Доступные столбцы: {info['columns']}")
+        
+        return has_target
\ No newline at end of file
@@ -2,16 +2,147 @@
 import pandas as pd
 import numpy as np
 import re
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from config import *
+from employee_store import _normalize, employee_key
+from value_cache import ValueCache
+from kpi_history import KPIHistory, kpi_columns, window_suffix
+from stage_cache import code_version
+
+def _experience_to_months(exp):
+    """Стаж ('2 года 6 месяцев') в месяцы"""
+    if pd.isna(exp) or exp == 'нет':
+        return 0
+    exp_str = str(exp)
+    years = re.findall(r'(\d+)\s*год', exp_str)
+    months = re.findall(r'(\d+)\s*месяц', exp_str)
+    total_months = 0
+    if years:
+        total_months += int(years[0]) * 12
+    if months:
+        total_months += int(months[0])
+    return total_months
+
+def _parse_dates(values):
+    """Даты столбца: уникальные значения разбираются одним вектором.
+    
+    Формат выводится по столбцу целиком, как у pd.to_datetime(столбец),
+    а не для каждого значения отдельно ('01.02.2025' не станет 2 января).
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors='coerce').to_numpy()
+    # Код пропуска -1 указывает на добавленный в конец NaT
+    parsed = np.append(parsed, np.datetime64('NaT', 'ns'))
+    return pd.Series(parsed[codes], index=values.index)
+
+# Кэш разбора повторяющихся значений стажа (общий для всех шардов процесса)
+_experience_cache = ValueCache(_experience_to_months)
+
+def _process_shard(raw_path, cache=None):
+    """Полный пайплайн для одной книги (выполняется в отдельном процессе)"""
+    return DataProcessor(raw_path).process_all(cache).df
 
 class DataProcessor:
-    def __init__(self):
+    # Стадии пайплайна в порядке выполнения
+    STAGES = [
+        'load_raw_data', 'clean_data', 'process_identity', 'process_gender',
+        'process_experience', 'process_kpi', 'process_dates',
+        'encode_categorical', 'process_target', 'finalize_dataset'
+    ]
+    # Код вне метода стадии, от которого зависит ее результат (входит в версию стадии)
+    STAGE_DEPENDENCIES = {
+        'process_identity': (employee_key, _normalize),
+        'process_experience': (_experience_to_months, ValueCache),
+        'process_kpi': (KPIHistory, kpi_columns, window_suffix),
+        'process_dates': (_parse_dates,)
+    }
+    
+    def __init__(self, raw_path=RAW_DATA_PATH):
+        self.raw_path = raw_path
         self.df = None
     
+    @staticmethod
+    def resolve_shards(source):
+        """Список книг шардов: каталог (*.xlsx) или glob-шаблон"""
+        if os.path.isdir(source):
+            source = os.path.join(source, '*.xlsx')
+        # Временные файлы Excel (~$...) не являются книгами
+        return sorted(
+            path for path in glob.glob(str(source))
+            if not os.path.basename(path).startswith('~$')
+        )
+    
+    @classmethod
+    def process_sharded(cls, source, workers=None, cache=None):
+        """Обработка набора книг (по одной на юр.лицо/филиал) в пуле процессов"""
+        paths = cls.resolve_shards(source)
+        if not paths:
+            raise FileNotFoundError(f"Не найдено книг для обработки: {source}")
+        
+        workers = workers or min(len(paths), os.cpu_count() or 1)
+        print(f"Шардов: {len(paths)}, процессов: {workers}")
+        if workers == 1:
+            frames = [_process_shard(path, cache) for path in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                frames = list(executor.map(_process_shard, paths, [cache] * len(paths)))
+        
+        processor = cls(paths[0])
+        processor.df = cls.merge_shards(frames)
+        print(f"Объединенный датасет: {processor.df.shape[0]} строк, {processor.df.shape[1]} столбцов")
+        return processor
+    
+    @staticmethod
+    def merge_shards(frames):
+        """Объединение шардов с согласованием One-Hot столбцов.
+        
+        Итоговые столбцы - объединение столбцов шардов; категории, которых
+        нет в шарде, заполняются нулями, группы One-Hot отсортированы,
+        как после get_dummies по полному набору.
+        """
+        columns = []
+        seen = set()
+        for frame in frames:
+            for col in frame.columns:
+                if col not in seen:
+                    seen.add(col)
+                    columns.append(col)
+        
+        def one_hot_prefix(col):
+            for prefix in ONE_HOT_COLUMNS:
+                if isinstance(col, str) and col.startswith(f'{prefix}_'):
+                    return prefix
+            return None
+        
+        ordered = []
+        emitted = set()
+        for col in columns:
+            prefix = one_hot_prefix(col)
+            if prefix is None:
+                ordered.append(col)
+            elif prefix not in emitted:
+                emitted.add(prefix)
+                ordered.extend(sorted(c for c in columns if one_hot_prefix(c) == prefix))
+        
+        dummy_columns = [col for col in ordered if one_hot_prefix(col)]
+        aligned = []
+        for frame in frames:
+            frame = frame.reindex(columns=ordered)
+            frame[dummy_columns] = frame[dummy_columns].fillna(False).astype(bool)
+            aligned.append(frame)
+        df = pd.concat(aligned, ignore_index=True)
+        
+        # Признаки, отсутствующие в части шардов, заполняются как в finalize_dataset
+        feature_columns = [col for col in df.columns if col not in (TARGET_COLUMN, ID_COLUMN)]
+        df[feature_columns] = df[feature_columns].fillna(0)
+        return df
+    
     def load_raw_data(self):
         """Загрузка исходных данных"""
-        self.df = pd.read_excel(RAW_DATA_PATH, sheet_name='Лист1', header=1)
+        self.df = pd.read_excel(self.raw_path, sheet_name='Лист1', header=1)
         print(f"Загружено {len(self.df)} записей")
         print(f"Столбцы в данных: {list(self.df.columns)}")
         return self
@@ -36,6 +167,17 @@ class DataProcessor:
             })
         return self
     
+    def process_identity(self):
+        """Стабильный идентификатор сотрудника (до удаления ФИО)"""
+        key_columns = [
+            col for col in EXPLICIT_ID_FIELDS + EMPLOYEE_KEY_FIELDS if col in self.df.columns
+        ]
+        key_source = self.df[key_columns] if key_columns else self.df
+        self.df[ID_COLUMN] = [
+            employee_key(record) for record in key_source.to_dict('records')
+        ]
+        return self
+    
     def process_gender(self):
         """Определение пола по ФИО"""
         def detect_gender(name):
@@ -55,102 +197,44 @@ class DataProcessor:
         return self
     
     def process_experience(self):
-        """Преобразование стажа в месяцы"""
-        def experience_to_months(exp):
-            if pd.isna(exp) or exp == 'нет':
-                return 0
-            exp_str = str(exp)
-            years = re.findall(r'(\d+)\s*год', exp_str)
-            months = re.findall(r'(\d+)\s*месяц', exp_str)
-            total_months = 0
-            if years:
-                total_months += int(years[0]) * 12
-            if months:
-                total_months += int(months[0])
-            return total_months
-        
-        self.df['Стаж_месяцы'] = self.df['Стаж'].apply(experience_to_months)
+        """Преобразование стажа в месяцы (каждое уникальное значение разбирается один раз)"""
+        self.df['Стаж_месяцы'] = _experience_cache.map_unique(self.df['Стаж'], dtype=np.int64)
         return self
     
     def process_kpi(self):
         """Обработка KPI показателей - сохраняем все значения"""
-        # Сначала обрабатываем KPI столбцы
-        for col in KPI_COLUMNS:
-            if col in self.df.columns:
-                # Исправляем FutureWarning
-                self.df[col] = self.df[col].replace({'нет': np.nan})
-                self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
+        # Месячные столбцы KPI: ряд любой длины ('июнь', 'июль 2025', ...)
+        available_kpi_cols = kpi_columns(self.df.columns)
         
-        # Вместо агрегации создаем признаки на основе всех KPI значений
-        available_kpi_cols = [col for col in KPI_COLUMNS if col in self.df.columns]
+        # Сначала обрабатываем KPI столбцы
+        for col in available_kpi_cols:
+            # Исправляем FutureWarning
+            self.df[col] = self.df[col].replace({'нет': np.nan})
+            self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
         
         if available_kpi_cols:
             # Сохраняем все исходные KPI значения как отдельные признаки
             # Они уже обработаны выше, просто переименуем для ясности
             kpi_rename = {col: f'KPI_{col}' for col in available_kpi_cols}
             self.df = self.df.rename(columns=kpi_rename)
-            
-            # Создаем дополнительные признаки на основе KPI
             kpi_new_cols = [f'KPI_{col}' for col in available_kpi_cols]
+            kpi_matrix = self.df[kpi_new_cols].to_numpy(dtype=float)
             
-            # Количество заполненных KPI показателей
-            self.df['KPI_заполнено_показателей'] = self.df[kpi_new_cols].notna().sum(axis=1)
-            
-            # Стабильность KPI (стандартное отклонение)
-            self.df['KPI_стабильность'] = self.df[kpi_new_cols].std(axis=1)
-            
-            # Минимальный и максимальный KPI
-            self.df['KPI_мин'] = self.df[kpi_new_cols].min(axis=1)
-            self.df['KPI_макс'] = self.df[kpi_new_cols].max(axis=1)
-            
-            # Размах KPI (макс - мин)
-            self.df['KPI_размах'] = self.df['KPI_макс'] - self.df['KPI_мин']
-            
-            # Расчет тренда KPI (наклон линейной регрессии)
-            def calculate_trend(row):
-                kpi_values = row[kpi_new_cols].values
-                try:
-                    kpi_values_float = kpi_values.astype(float)
-                except (ValueError, TypeError):
-                    return 0
-                    
-                if np.all(np.isnan(kpi_values_float)):
-                    return 0
-                    
-                valid_indices = ~np.isnan(kpi_values_float)
-                if np.sum(valid_indices) < 2:
-                    return 0
-                    
-                x = np.where(valid_indices)[0]
-                y = kpi_values_float[valid_indices]
-                try:
-                    trend = np.polyfit(x, y, 1)[0]
-                    return trend
-                except:
-                    return 0
-            
-            self.df['KPI_тренд'] = self.df.apply(calculate_trend, axis=1)
-            
-            # Последний доступный KPI
-            def get_last_kpi(row):
-                kpi_values = row[kpi_new_cols].values
-                # Ищем последний не-NaN значение (с конца массива)
-                for i in range(len(kpi_values)-1, -1, -1):
-                    if not pd.isna(kpi_values[i]):
-                        return kpi_values[i]
-                return np.nan
-            
-            self.df['KPI_последний'] = self.df.apply(get_last_kpi, axis=1)
+            # Статистики (заполненность, стабильность, мин/макс, размах, тренд,
+            # последнее значение) накапливаются месяц за месяцем для каждого окна
+            for window in KPI_WINDOWS:
+                history = KPIHistory(len(self.df), window)
+                for month_values in kpi_matrix.T:
+                    history.add_month(month_values)
+                suffix = window_suffix(window)
+                for feature, values in history.features(ddof=1).items():
+                    self.df[feature + suffix] = values
             
         else:
             # Если нет KPI данных, создаем заглушки
-            self.df['KPI_заполнено_показателей'] = 0
-            self.df['KPI_стабильность'] = 0
-            self.df['KPI_тренд'] = 0
-            self.df['KPI_мин'] = 0
-            self.df['KPI_макс'] = 0
-            self.df['KPI_размах'] = 0
-            self.df['KPI_последний'] = 0
+            for window in KPI_WINDOWS:
+                for feature in KPIHistory.FEATURES:
+                    self.df[feature + window_suffix(window)] = 0
             
         return self
     
@@ -164,10 +248,7 @@ class DataProcessor:
             'Отпуск'
         ])
         if vacation_column:
-            vacation_dates = pd.to_datetime(
-                self.df[vacation_column], 
-                errors='coerce'
-            )
+            vacation_dates = _parse_dates(self.df[vacation_column])
             self.df['Отпуск_месяцев_назад'] = (
                 (current_date - vacation_dates).dt.days // 30
             )
@@ -221,11 +302,9 @@ class DataProcessor:
             }).fillna(0)
         
         # One-Hot Encoding для города и должности
-        if 'Город' in self.df.columns:
-            self.df = pd.get_dummies(self.df, columns=['Город'], prefix=['Город'])
-        
-        if 'Должность' in self.df.columns:
-            self.df = pd.get_dummies(self.df, columns=['Должность'], prefix=['Должность'])
+        for col in ONE_HOT_COLUMNS:
+            if col in self.df.columns:
+                self.df = pd.get_dummies(self.df, columns=[col], prefix=[col])
         
         # Признак руководства
         sub_column = self._get_column_name([
@@ -276,7 +355,7 @@ class DataProcessor:
         ]
         
         # Удаляем исходные KPI столбцы (они уже переименованы)
-        original_kpi_to_drop = [col for col in KPI_COLUMNS if col in self.df.columns]
+        original_kpi_to_drop = kpi_columns(self.df.columns)
         columns_to_drop.extend(original_kpi_to_drop)
         
         for col in optional_columns:
@@ -286,7 +365,7 @@ class DataProcessor:
         self.df.drop(columns=columns_to_drop, errors='ignore', inplace=True)
         
         # Заполнение пропусков только в признаках
-        feature_columns = [col for col in self.df.columns if col != TARGET_COLUMN]
+        feature_columns = [col for col in self.df.columns if col not in (TARGET_COLUMN, ID_COLUMN)]
         self.df[feature_columns] = self.df[feature_columns].fillna(0)
         
         print(f"Финальный датасет: {self.df.shape[0]} строк, {self.df.shape[1]} столбцов")
@@ -295,14 +374,38 @@ class DataProcessor:
         
         return self
     
-    def process_all(self):
-        """Полный пайплайн обработки"""
-        return (self.load_raw_data()
-                  .clean_data()
-                  .process_gender()
-                  .process_experience()
-                  .process_kpi()
-                  .process_dates()
-                  .encode_categorical()
-                  .process_target()
-                  .finalize_dataset())
\ No newline at end of file
+    @classmethod
+    def stage_versions(cls):
+        """Версии кода стадий: исходный текст метода и его зависимостей"""
+        return [
+            (name, code_version(getattr(cls, name), cls._get_column_name,
+                                *cls.STAGE_DEPENDENCIES.get(name, ())))
+            for name in cls.STAGES
+        ]
+    
+    def process_all(self, cache=None):
+        """Полный пайплайн обработки.
+        
+        cache (StageCache) - результат каждой стадии сохраняется на диск,
+        повторный запуск продолжается с первой стадии, у которой
+        изменились вход, конфигурация или код (своя или предыдущих).
+        """
+        if cache is None:
+            for name in self.STAGES:
+                getattr(self, name)()
+            return self
+        
+        keys = cache.stage_keys(self.raw_path, self.stage_versions())
+        start = 0
+        for i in reversed(range(len(self.STAGES))):
+            df = cache.get(keys[i])
+            if df is not None:
+                self.df = df
+                start = i + 1
+                print(f"♻️  Стадии до {self.STAGES[i]} включительно взяты из кэша")
+                break
+        
+        for name, key in zip(self.STAGES[start:], keys[start:]):
+            getattr(self, name)()
+            cache.put(key, self.df)
+        return self
\ No newline at end of file
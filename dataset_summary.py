@@ -0,0 +1,219 @@
+# dataset_summary.py
+import json
+import math
+import os
+from config import *
+
+def _target_key(value):
+    """Канонический ключ значения цели: 1, 1.0 и np.int64(1) дают один ключ"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, (bool, int, float)):
+        return json.dumps(float(value))
+    return json.dumps(value, ensure_ascii=False)
+
+class DatasetSummary:
+    """Сводная статистика датасета, обновляемая инкрементально.
+
+    Хранится рядом с данными (SUMMARY_JSON), чтобы запросы информации
+    о датасете не читали dataset.json / dataset.csv целиком.
+    """
+
+    def __init__(self):
+        self.total_records = 0
+        self.columns = []
+        self.schema = {}
+        self.null_counts = {}
+        self.numeric = {}
+        self.target_counts = {}
+        self.target_missing = 0
+        # Границы min/max становятся неточными после удаления записей
+        self.bounds_exact = True
+        self.metadata = {}
+
+    @classmethod
+    def from_dataframe(cls, df, metadata=None):
+        summary = cls()
+        summary.metadata = dict(metadata or {})
+        return summary.add_dataframe(df)
+
+    def add_records(self, records):
+        """Учет новых записей (стоимость пропорциональна их числу)"""
+        import pandas as pd
+        if records:
+            self.add_dataframe(pd.DataFrame(records))
+        return self
+
+    def remove_records(self, records):
+        """Исключение записей (например, замененных при upsert)"""
+        import pandas as pd
+        if records:
+            self._update(pd.DataFrame(records), sign=-1)
+        return self
+
+    def add_dataframe(self, df):
+        return self._update(df, sign=1)
+
+    def _update(self, df, sign):
+        import pandas as pd
+
+        # Числовые ли столбцы, решается по уже учтенным данным, а не по пакету:
+        # в пакете из одной записи текстовый столбец может не иметь значений
+        new_columns = set()
+        for col in df.columns:
+            if col not in self.schema or self.null_counts[col] == self.total_records:
+                new_columns.add(col)
+
+        for col in df.columns:
+            if col not in self.schema:
+                # У ранее учтенных записей нового столбца нет
+                self.columns.append(col)
+                self.schema[col] = str(df[col].dtype)
+                self.null_counts[col] = self.total_records
+
+        # Столбцы, отсутствующие в записях, считаются пропусками
+        for col in self.columns:
+            if col not in df.columns:
+                self.null_counts[col] += sign * len(df)
+        for col, count in df.isna().sum().items():
+            self.null_counts[col] += sign * int(count)
+
+        self.total_records += sign * len(df)
+
+        for col in df.columns:
+            if col == TARGET_COLUMN:
+                continue
+            values = df[col].dropna()
+            if col in self.numeric:
+                values = pd.to_numeric(values, errors='coerce').dropna()
+            elif sign < 0 or col not in new_columns:
+                continue
+            elif not pd.api.types.is_numeric_dtype(values):
+                # Смешанный столбец (например, bool с пропусками) считаем
+                # числовым, только если все значения приводятся к числу
+                numeric_values = pd.to_numeric(values, errors='coerce')
+                if numeric_values.isna().any() or values.empty:
+                    continue
+                values = numeric_values
+            elif values.empty:
+                continue
+            values = values.astype(float)
+            stats = self.numeric.setdefault(col, {'count': 0, 'sum': 0.0, 'min': None, 'max': None})
+            stats['count'] += sign * len(values)
+            stats['sum'] += sign * float(values.sum())
+            if stats['count'] <= 0:
+                # Значений не осталось - границ нет
+                stats.update(count=0, sum=0.0, min=None, max=None)
+                continue
+            if values.empty:
+                continue
+            if sign > 0:
+                stats['min'] = float(values.min()) if stats['min'] is None else min(stats['min'], float(values.min()))
+                stats['max'] = float(values.max()) if stats['max'] is None else max(stats['max'], float(values.max()))
+            elif (stats['min'] is None or stats['max'] is None
+                  or float(values.min()) <= stats['min'] or float(values.max()) >= stats['max']):
+                # Удалено граничное значение - точные границы знает только verify
+                self.bounds_exact = False
+
+        # Пропуски цели - и NaN, и записи без столбца цели (в том числе
+        # учтенные до его появления): это ровно null_counts столбца
+        self.target_missing = self.null_counts.get(TARGET_COLUMN, 0)
+        if TARGET_COLUMN in df.columns:
+            for value, count in df[TARGET_COLUMN].value_counts().items():
+                key = _target_key(value)
+                self.target_counts[key] = self.target_counts.get(key, 0) + sign * int(count)
+                if self.target_counts[key] == 0:
+                    del self.target_counts[key]
+
+        return self
+
+    @property
+    def has_target(self):
+        return TARGET_COLUMN in self.schema
+
+    def info(self):
+        """Информация о датасете в формате DataManager.get_dataset_info"""
+        info = {
+            'total_records': self.total_records,
+            'columns': list(self.columns),
+            'has_target': self.has_target,
+            'metadata': self.metadata,
+            'schema': dict(self.schema),
+            'null_counts': dict(self.null_counts),
+            'numeric_stats': {
+                col: {
+                    'min': stats['min'],
+                    'max': stats['max'],
+                    'mean': stats['sum'] / stats['count'] if stats['count'] else None
+                }
+                for col, stats in self.numeric.items()
+            },
+            'bounds_exact': self.bounds_exact
+        }
+
+        if info['has_target']:
+            info['target_missing'] = self.target_missing
+            info['target_distribution'] = {
+                json.loads(key): count for key, count in self.target_counts.items()
+            }
+        else:
+            info['target_missing'] = 'N/A'
+            info['target_distribution'] = 'N/A'
+            info['warning'] = f"Целевая переменная '{TARGET_COLUMN}' отсутствует"
+
+        return info
+
+    def diff(self, other):
+        """Расхождения с другой сводкой (для режима проверки)"""
+        mismatches = []
+        for field in ('total_records', 'columns', 'null_counts', 'target_counts', 'target_missing'):
+            if getattr(self, field) != getattr(other, field):
+                mismatches.append(field)
+        for col, stats in other.numeric.items():
+            own = self.numeric.get(col)
+            if own is None or own['count'] != stats['count'] or not math.isclose(
+                    own['sum'], stats['sum'], rel_tol=1e-9, abs_tol=1e-9):
+                mismatches.append(f'numeric:{col}')
+            elif (own['min'], own['max']) != (stats['min'], stats['max']):
+                mismatches.append(f'bounds:{col}')
+        return mismatches
+
+    def to_dict(self):
+        return {
+            'total_records': self.total_records,
+            'columns': self.columns,
+            'schema': self.schema,
+            'null_counts': self.null_counts,
+            'numeric': self.numeric,
+            'target_counts': self.target_counts,
+            'target_missing': self.target_missing,
+            'bounds_exact': self.bounds_exact,
+            'metadata': self.metadata
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls()
+        for key, value in data.items():
+            setattr(summary, key, value)
+        # Сводки, сохраненные до канонических ключей ('1' и '1.0')
+        target_counts = {}
+        for key, count in summary.target_counts.items():
+            key = _target_key(json.loads(key))
+            target_counts[key] = target_counts.get(key, 0) + count
+        summary.target_counts = {key: count for key, count in target_counts.items() if count}
+        return summary
+
+    def save(self, path=SUMMARY_JSON):
+        """Атомарное сохранение сводки"""
+        ensure_dirs()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return self
+
+    @classmethod
+    def load(cls, path=SUMMARY_JSON):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
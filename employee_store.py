@@ -0,0 +1,352 @@
+# employee_store.py
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from config import *
+
+def _normalize(value):
+    return ' '.join(str(value).lower().replace('ё', 'е').split())
+
+def employee_key(record):
+    """Стабильный идентификатор сотрудника.
+
+    Порядок: уже вычисленный ключ, явный ID, хеш ФИО + юр.лица.
+    Для записей без этих полей используется хеш содержимого,
+    чтобы полные дубликаты все равно схлопывались.
+    """
+    key = record.get(ID_COLUMN)
+    if key is not None and key == key:
+        return str(key)
+
+    for field in EXPLICIT_ID_FIELDS:
+        value = record.get(field)
+        if value is not None and value == value and str(value).strip():
+            return f"id:{str(value).strip()}"
+
+    if any(record.get(field) is not None for field in EMPLOYEE_KEY_FIELDS):
+        source = '|'.join(_normalize(record.get(field, '')) for field in EMPLOYEE_KEY_FIELDS)
+    else:
+        source = json.dumps(record, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:20]
+
+def features_hash(record):
+    """Хеш признаков записи (без ключа и целевой переменной) для поиска устаревших прогнозов"""
+    features = {k: v for k, v in record.items() if k not in (ID_COLUMN, TARGET_COLUMN)}
+    source = json.dumps(features, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:20]
+
+def _kpi_value(value):
+    """Значение KPI за месяц (NaN - нет данных, как 'нет' в DataProcessor)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+def _kpi_month_columns(record):
+    """Месячные столбцы KPI обработанной записи ('KPI_июнь', ...) в порядке следования"""
+    from kpi_history import kpi_columns
+    months = kpi_columns(column[len('KPI_'):] for column in record if column.startswith('KPI_'))
+    return [f'KPI_{month}' for month in months]
+
+
+class EmployeeStore:
+    """Хранилище обработанных записей с первичным ключом по сотруднику.
+
+    SQLite (B-дерево по ключу): get/upsert/delete за O(log n),
+    массовый upsert затрагивает только страницы измененных ключей.
+    Рядом хранится материализованная таблица прогнозов: строка
+    устаревает, если изменился хеш признаков или версия модели.
+    Для каждого сотрудника также хранится состояние KPIHistory, чтобы
+    новый месяц KPI обновлял признаки без пересчета всей истории.
+    """
+
+    # Ограничение SQLite на число параметров в одном запросе
+    _IN_CHUNK = 500
+
+    def __init__(self, path=EMPLOYEE_STORE):
+        self.path = path
+        ensure_dirs()
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS employees ("
+            " key TEXT PRIMARY KEY,"
+            " record TEXT NOT NULL,"
+            " version INTEGER NOT NULL DEFAULT 1,"
+            " updated TEXT NOT NULL,"
+            " features_hash TEXT,"
+            " kpi_state TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " key TEXT PRIMARY KEY,"
+            " features_hash TEXT NOT NULL,"
+            " model_version TEXT NOT NULL,"
+            " prediction INTEGER NOT NULL,"
+            " burnout_probability REAL NOT NULL,"
+            " no_burnout_probability REAL NOT NULL,"
+            " confidence REAL NOT NULL,"
+            " status TEXT NOT NULL,"
+            " scored TEXT NOT NULL)"
+        )
+        self._migrate()
+        self.conn.commit()
+
+    def _migrate(self):
+        """Хранилища, созданные до таблицы прогнозов: добавляем и заполняем хеш признаков"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(employees)")}
+        if 'features_hash' not in columns:
+            self.conn.execute("ALTER TABLE employees ADD COLUMN features_hash TEXT")
+        if 'kpi_state' not in columns:
+            self.conn.execute("ALTER TABLE employees ADD COLUMN kpi_state TEXT")
+        rows = self.conn.execute(
+            "SELECT key, record FROM employees WHERE features_hash IS NULL"
+        ).fetchall()
+        self.conn.executemany(
+            "UPDATE employees SET features_hash = ? WHERE key = ?",
+            ((features_hash(json.loads(record)), key) for key, record in rows)
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+
+    @staticmethod
+    def _prepare(records):
+        """Проставляет ключи; при повторе ключа в пакете побеждает последняя запись"""
+        prepared = {}
+        for record in records:
+            record = dict(record)
+            record[ID_COLUMN] = employee_key(record)
+            prepared[record[ID_COLUMN]] = record
+        return prepared
+
+    def get(self, key):
+        row = self.conn.execute(
+            "SELECT record FROM employees WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), self._IN_CHUNK):
+            chunk = keys[start:start + self._IN_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            for key, record in self.conn.execute(
+                    f"SELECT key, record FROM employees WHERE key IN ({placeholders})", chunk):
+                found[key] = json.loads(record)
+        return found
+
+    def upsert(self, record):
+        return self.upsert_many([record])
+
+    def upsert_many(self, records, on_change=None):
+        """Вставка или замена записей.
+
+        Возвращает (записи после дедупликации, замененные старые версии).
+        on_change(records, replaced) вызывается до фиксации транзакции:
+        исключение в нем откатывает изменения.
+        """
+        prepared = self._prepare(records)
+        replaced = self.get_many(prepared.keys())
+        now = datetime.now().isoformat()
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO employees (key, record, version, updated, features_hash) "
+                "VALUES (?, ?, 1, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET record = excluded.record, "
+                "version = employees.version + 1, updated = excluded.updated, "
+                "features_hash = excluded.features_hash, kpi_state = NULL",
+                (
+                    (key, json.dumps(record, ensure_ascii=False, default=str), now,
+                     features_hash(record))
+                    for key, record in prepared.items()
+                )
+            )
+            if on_change is not None:
+                on_change(list(prepared.values()), list(replaced.values()))
+        return list(prepared.values()), list(replaced.values())
+
+    def delete(self, key):
+        return self.delete_many([key]).get(key)
+
+    def delete_many(self, keys, on_change=None):
+        """Удаление по ключам; возвращает удаленные записи.
+
+        on_change(removed) вызывается до фиксации транзакции.
+        """
+        removed = self.get_many(keys)
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM employees WHERE key = ?", ((key,) for key in removed)
+            )
+            self.conn.executemany(
+                "DELETE FROM predictions WHERE key = ?", ((key,) for key in removed)
+            )
+            if on_change is not None:
+                on_change(removed)
+        return removed
+
+    def replace_all(self, records):
+        """Полная перезапись хранилища (после полной обработки данных)"""
+        prepared = self._prepare(records)
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.execute("DELETE FROM employees")
+            self.conn.executemany(
+                "INSERT INTO employees (key, record, version, updated, features_hash) "
+                "VALUES (?, ?, 1, ?, ?)",
+                (
+                    (key, json.dumps(record, ensure_ascii=False, default=str), now,
+                     features_hash(record))
+                    for key, record in prepared.items()
+                )
+            )
+            # Прогнозы неизмененных сотрудников остаются действительными
+            self.conn.execute(
+                "DELETE FROM predictions WHERE key NOT IN (SELECT key FROM employees)"
+            )
+        return list(prepared.values())
+
+    def add_kpi_month(self, month, values, on_change=None):
+        """Новый месяц KPI: values - {ключ сотрудника: значение}.
+
+        Признаки KPI обновляются из состояния KPIHistory, хранимого рядом
+        с записью, за O(1) на сотрудника. По месячным столбцам записи
+        состояние восстанавливается только при первом обращении и после
+        замены записи (upsert его сбрасывает). Неизвестные ключи
+        пропускаются. Возвращает (обновленные записи, прежние версии);
+        on_change - как у upsert_many.
+        """
+        import numpy as np
+        from kpi_history import KPIHistory, window_suffix
+
+        column = f'KPI_{month}'
+        windows = {window_suffix(window): window for window in KPI_WINDOWS}
+        keys = list(values)
+        replaced, states = {}, {}
+        for start in range(0, len(keys), self._IN_CHUNK):
+            chunk = keys[start:start + self._IN_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            for key, record, state in self.conn.execute(
+                    f"SELECT key, record, kpi_state FROM employees WHERE key IN ({placeholders})", chunk):
+                replaced[key] = json.loads(record)
+                state = json.loads(state) if state else None
+                # Состояние под другие окна (изменился KPI_WINDOWS) строится заново
+                states[key] = state if state is not None and set(state) == set(windows) else None
+                if column in replaced[key]:
+                    raise ValueError(f"KPI за '{month}' уже есть у сотрудника {key}")
+
+        # Восстановление состояния по истории записи, сгруппированной по набору месяцев
+        pending = {}
+        for key, state in states.items():
+            if state is None:
+                pending.setdefault(tuple(_kpi_month_columns(replaced[key])), []).append(key)
+        for months, group in pending.items():
+            matrix = np.array([[replaced[key][col] for col in months] for key in group],
+                              dtype=float).reshape(len(group), len(months))
+            # finalize_dataset заполняет пропуски нулями: 0 в записи - нет данных
+            matrix[matrix == 0] = np.nan
+            for key in group:
+                states[key] = {}
+            for suffix, window in windows.items():
+                history = KPIHistory(len(group), window)
+                for month_values in matrix.T:
+                    history.add_month(month_values)
+                for key, state in zip(group, history.to_states()):
+                    states[key][suffix] = state
+
+        # Добавление месяца группами сотрудников с одинаковой длиной истории
+        records = {key: dict(record) for key, record in replaced.items()}
+        groups = {}
+        for key, state in states.items():
+            groups.setdefault(next(iter(state.values()))['t'], []).append(key)
+        for group in groups.values():
+            month_values = np.array([_kpi_value(values[key]) for key in group])
+            for key, value in zip(group, month_values):
+                records[key][column] = 0.0 if np.isnan(value) else float(value)
+            for suffix, window in windows.items():
+                history = KPIHistory.from_states([states[key][suffix] for key in group], window)
+                history.add_month(month_values)
+                for feature, feature_values in history.features(ddof=1).items():
+                    for key, value in zip(group, feature_values.tolist()):
+                        records[key][feature + suffix] = 0 if value != value else value
+                for key, state in zip(group, history.to_states()):
+                    states[key][suffix] = state
+
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE employees SET record = ?, version = version + 1, updated = ?, "
+                "features_hash = ?, kpi_state = ? WHERE key = ?",
+                (
+                    (json.dumps(record, ensure_ascii=False, default=str), now, features_hash(record),
+                     json.dumps(states[key]), key)
+                    for key, record in records.items()
+                )
+            )
+            if on_change is not None:
+                on_change(list(records.values()), list(replaced.values()))
+        return list(records.values()), list(replaced.values())
+
+    def keys(self):
+        return [row[0] for row in self.conn.execute("SELECT key FROM employees ORDER BY rowid")]
+
+    def iter_records(self, chunk_size=10000):
+        """Последние версии всех сотрудников, порциями"""
+        cursor = self.conn.execute("SELECT record FROM employees ORDER BY rowid")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [json.loads(row[0]) for row in rows]
+
+    def stale_keys(self, model_version):
+        """Ключи сотрудников без актуального прогноза для данной версии модели"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT e.key FROM employees e LEFT JOIN predictions p ON p.key = e.key "
+            "WHERE p.key IS NULL OR p.features_hash != e.features_hash "
+            "OR p.model_version != ? ORDER BY e.rowid",
+            (model_version,)
+        )]
+
+    def save_predictions(self, rows):
+        """Запись прогнозов: (key, features_hash, model_version, prediction,
+        burnout_probability, no_burnout_probability, confidence, status)"""
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO predictions (key, features_hash, model_version, prediction, "
+                "burnout_probability, no_burnout_probability, confidence, status, scored) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (tuple(row) + (now,) for row in rows)
+            )
+
+    def get_prediction(self, key):
+        """Материализованный прогноз сотрудника (с признаком актуальности)"""
+        cursor = self.conn.execute(
+            "SELECT p.*, p.features_hash = e.features_hash AS features_current "
+            "FROM predictions p JOIN employees e ON e.key = p.key WHERE p.key = ?", (key,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        prediction = dict(zip((column[0] for column in cursor.description), row))
+        prediction['features_current'] = bool(prediction['features_current'])
+        return prediction
+
+    def prediction_counts(self, model_version):
+        """Сколько сотрудников оценено и сколько прогнозов требует пересчета"""
+        scored = self.conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        return {'employees': len(self), 'scored': scored, 'stale': len(self.stale_keys(model_version))}
@@ -0,0 +1,161 @@
+# kpi_history.py
+import re
+import numpy as np
+
+MONTH_NAMES = [
+    'январь', 'февраль', 'март', 'апрель', 'май', 'июнь',
+    'июль', 'август', 'сентябрь', 'октябрь', 'ноябрь', 'декабрь'
+]
+
+# Месячный столбец KPI: 'июнь' или 'июнь 2025'
+_MONTH_COLUMN = re.compile(r'^\s*(' + '|'.join(MONTH_NAMES) + r')(\s+\d{4})?\s*$', re.IGNORECASE)
+
+def kpi_columns(columns):
+    """Месячные столбцы KPI в порядке следования (ряд произвольной длины)"""
+    return [col for col in columns if isinstance(col, str) and _MONTH_COLUMN.match(col)]
+
+def window_suffix(window):
+    """Суффикс признаков окна: '' для всей истории, '_3м' для окна в 3 месяца"""
+    return '' if window is None else f'_{window}м'
+
+
+class KPIHistory:
+    """Скользящие статистики месячного ряда KPI сразу для группы сотрудников.
+
+    Хранятся достаточные статистики (n, Σt, Σt², Σx, Σx², Σtx) по всем
+    сотрудникам, поэтому добавление месяца обновляет все признаки за O(1)
+    на сотрудника. Суммы по x считаются от первого значения сотрудника,
+    чтобы дисперсия постоянного ряда была точно нулевой.
+
+    window - длина окна в месяцах (None - вся история): ушедший из окна
+    месяц вычитается из сумм, а минимум и максимум окна собираются из
+    суффиксов предыдущего блока и префикса текущего (van Herk/Gil-Werman),
+    что дает амортизированное O(1).
+    """
+
+    FEATURES = ('KPI_заполнено_показателей', 'KPI_стабильность', 'KPI_мин', 'KPI_макс',
+                'KPI_размах', 'KPI_тренд', 'KPI_последний')
+    # Поля состояния: по сотруднику и (для окна) по месяцам окна
+    _STATE_ARRAYS = ('n', 'positive', 'sum_t', 'sum_tt', 'sum_x', 'sum_xx', 'sum_tx',
+                     'shift', 'last', 'last_t', 'minimum', 'maximum')
+    _WINDOW_ARRAYS = ('ring', 'suffix_min', 'suffix_max')
+
+    def __init__(self, n_employees, window=None):
+        self.window = window
+        self.t = 0
+        self.n = np.zeros(n_employees)
+        self.positive = np.zeros(n_employees)
+        self.sum_t = np.zeros(n_employees)
+        self.sum_tt = np.zeros(n_employees)
+        self.sum_x = np.zeros(n_employees)
+        self.sum_xx = np.zeros(n_employees)
+        self.sum_tx = np.zeros(n_employees)
+        self.shift = np.full(n_employees, np.nan)
+        self.last = np.full(n_employees, np.nan)
+        self.last_t = np.full(n_employees, -1)
+        # Для окна - префикс текущего блока, иначе - вся история
+        self.minimum = np.full(n_employees, np.nan)
+        self.maximum = np.full(n_employees, np.nan)
+        if window:
+            self.ring = np.full((window, n_employees), np.nan)
+            self.suffix_min = np.full((window, n_employees), np.nan)
+            self.suffix_max = np.full((window, n_employees), np.nan)
+
+    def _accumulate(self, values, t, sign):
+        valid = ~np.isnan(values)
+        x = np.where(valid, values - self.shift, 0.0)
+        weight = valid * sign
+        self.n += weight
+        self.positive += (values > 0) * sign
+        self.sum_t += weight * t
+        self.sum_tt += weight * t * t
+        self.sum_x += sign * x
+        self.sum_xx += sign * x * x
+        self.sum_tx += sign * t * x
+
+    def add_month(self, values):
+        """Добавление следующего месяца (NaN - нет данных за месяц)"""
+        values = np.asarray(values, dtype=float)
+        t = self.t
+        valid = ~np.isnan(values)
+        self.shift = np.where(np.isnan(self.shift) & valid, values, self.shift)
+
+        if self.window:
+            slot = t % self.window
+            if t >= self.window:
+                self._accumulate(self.ring[slot], t - self.window, -1)
+            self.ring[slot] = values
+            if slot == 0:
+                self.minimum = np.full_like(values, np.nan)
+                self.maximum = np.full_like(values, np.nan)
+
+        self._accumulate(values, t, 1)
+        self.last = np.where(valid, values, self.last)
+        self.last_t = np.where(valid, t, self.last_t)
+        self.minimum = np.fmin(self.minimum, values)
+        self.maximum = np.fmax(self.maximum, values)
+
+        if self.window and slot == self.window - 1:
+            # Блок завершен: суффиксы нужны окнам, начинающимся внутри него
+            self.suffix_min = np.fmin.accumulate(self.ring[::-1], axis=0)[::-1]
+            self.suffix_max = np.fmax.accumulate(self.ring[::-1], axis=0)[::-1]
+
+        self.t += 1
+        return self
+
+    def to_states(self):
+        """Состояние каждого сотрудника (для хранения рядом с его записью)"""
+        states = []
+        for i in range(len(self.n)):
+            state = {'window': self.window, 't': self.t}
+            for name in self._STATE_ARRAYS:
+                state[name] = getattr(self, name)[i].item()
+            if self.window:
+                for name in self._WINDOW_ARRAYS:
+                    state[name] = getattr(self, name)[:, i].tolist()
+            states.append(state)
+        return states
+
+    @classmethod
+    def from_states(cls, states, window=None):
+        """Группа сотрудников из сохраненных состояний одной длины истории"""
+        months = {state['t'] for state in states}
+        if len(months) > 1:
+            raise ValueError(f"Состояния KPI с разной длиной истории: {sorted(months)}")
+        history = cls(len(states), window)
+        history.t = months.pop() if months else 0
+        for name in cls._STATE_ARRAYS:
+            dtype = getattr(history, name).dtype
+            setattr(history, name, np.array([state[name] for state in states], dtype=dtype))
+        if window:
+            for name in cls._WINDOW_ARRAYS:
+                values = np.array([state[name] for state in states], dtype=float)
+                setattr(history, name, values.T.reshape(window, len(states)))
+        return history
+
+    def _extrema(self):
+        if not self.window or self.t % self.window == 0:
+            return self.minimum, self.maximum
+        start = self.t % self.window
+        return (np.fmin(self.suffix_min[start], self.minimum),
+                np.fmax(self.suffix_max[start], self.maximum))
+
+    def features(self, ddof=1):
+        """Признаки KPI по текущему окну (как у DataProcessor: std с ddof, NaN без данных)"""
+        n = self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (self.sum_xx - self.sum_x * self.sum_x / n) / (n - ddof)
+            std = np.where(n > ddof, np.sqrt(np.clip(variance, 0.0, None)), np.nan)
+
+            denominator = n * self.sum_tt - self.sum_t * self.sum_t
+            trend = np.where((n >= 2) & (denominator > 0),
+                             (n * self.sum_tx - self.sum_t * self.sum_x) / denominator, 0.0)
+
+        minimum, maximum = self._extrema()
+        last = self.last
+        if self.window:
+            last = np.where(self.last_t > self.t - 1 - self.window, last, np.nan)
+
+        return dict(zip(self.FEATURES, (
+            n.astype(np.int64), std, minimum, maximum, maximum - minimum, trend, last
+        )))
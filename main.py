@@ -1,13 +1,30 @@
 # main.py
-from data_processor import DataProcessor
-from data_manager import DataManager
-from config import *
+import argparse
 
 def main():
+    parser = argparse.ArgumentParser(description='Обработка сырых данных о сотрудниках')
+    parser.add_argument('--shards', default=None,
+                        help='Каталог или glob-шаблон книг (по одной на юр.лицо/филиал)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Число процессов для обработки шардов (по умолчанию - по числу ядер)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Не использовать кэш промежуточных результатов стадий')
+    args = parser.parse_args()
+    
+    # pandas и модули обработки загружаются только для реальной работы, не для --help
+    from data_processor import DataProcessor
+    from data_manager import DataManager
+    from stage_cache import StageCache
+    
+    cache = None if args.no_cache else StageCache()
+    
     # Обработка данных
     print("1. Обработка данных...")
-    processor = DataProcessor()
-    processor.process_all()
+    if args.shards:
+        processor = DataProcessor.process_sharded(args.shards, workers=args.workers, cache=cache)
+    else:
+        processor = DataProcessor()
+        processor.process_all(cache)
     
     # Сохранение в разных форматах
     print("\n2. Сохранение данных...")
@@ -25,4 +42,4 @@ def main():
     print("\n=== Обработка завершена ===")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,120 @@
+# stage_cache.py
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from config import *
+
+def _digest(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 входного файла (читается блоками)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def code_version(*objects):
+    """Версия кода стадии: хеш исходного текста функций и классов"""
+    return _digest(*(inspect.getsource(obj) for obj in objects))
+
+def config_fingerprint():
+    """Значения конфигурации, влияющие на результат обработки"""
+    values = {
+        'CURRENT_DATE': CURRENT_DATE,
+        'KPI_COLUMNS': KPI_COLUMNS,
+        'KPI_WINDOWS': KPI_WINDOWS,
+        'TARGET_COLUMN': TARGET_COLUMN,
+        'ONE_HOT_COLUMNS': ONE_HOT_COLUMNS,
+        'ID_COLUMN': ID_COLUMN,
+        'EXPLICIT_ID_FIELDS': EXPLICIT_ID_FIELDS,
+        'EMPLOYEE_KEY_FIELDS': EMPLOYEE_KEY_FIELDS,
+        'BINARY_MAPPING': BINARY_MAPPING,
+        'BURNOUT_MAPPING': BURNOUT_MAPPING
+    }
+    return _digest(json.dumps(values, ensure_ascii=False, sort_keys=True, default=str))
+
+
+class StageCache:
+    """Дисковый кэш промежуточных результатов стадий обработки.
+
+    Ключ стадии - хеш цепочки: входной файл, конфигурация, затем имя
+    и версия кода каждой стадии до текущей включительно. Изменение
+    стадии инвалидирует ее и все последующие. Результаты хранятся
+    в pickle (протокол 5), при превышении max_bytes удаляются давно
+    не использовавшиеся записи.
+    """
+
+    def __init__(self, directory=STAGE_CACHE_DIR, max_bytes=STAGE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def stage_keys(self, input_path, stages):
+        """Ключи для списка стадий [(имя, версия кода), ...]"""
+        key = _digest(file_digest(input_path), config_fingerprint())
+        keys = []
+        for name, version in stages:
+            key = _digest(key, name, version)
+            keys.append(key)
+        return keys
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        # Отметка использования для вытеснения по давности
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def put(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=5)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Удаление давно не использовавшихся записей сверх max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pkl'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.directory, name))
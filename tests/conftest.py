@@ -0,0 +1,10 @@
+# conftest.py
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+MODEL_DIR = PROJECT_ROOT / "burnout-service" / "model"
+
+for path in (PROJECT_ROOT, MODEL_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
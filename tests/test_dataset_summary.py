@@ -0,0 +1,50 @@
+# test_dataset_summary.py
+import numpy as np
+import pandas as pd
+
+from config import TARGET_COLUMN
+from dataset_summary import DatasetSummary
+
+
+def _records():
+    return [
+        {'employee_id': 'a', 'возраст': 30, TARGET_COLUMN: 1.0},
+        {'employee_id': 'b', 'возраст': 40, TARGET_COLUMN: np.nan},
+        {'employee_id': 'c', 'возраст': 50, TARGET_COLUMN: 0.0},
+    ]
+
+
+def test_upsert_then_delete_keeps_target_counts_canonical():
+    records = _records()
+    summary = DatasetSummary.from_dataframe(pd.DataFrame(records))
+
+    # Запись пришла с целым значением цели (dtype пакета int64)
+    replacement = {'employee_id': 'a', 'возраст': 31, TARGET_COLUMN: 1}
+    summary.remove_records([records[0]])
+    summary.add_records([replacement])
+    summary.remove_records([replacement])
+
+    rebuilt = DatasetSummary.from_dataframe(pd.DataFrame(records[1:]))
+    assert summary.target_counts == rebuilt.target_counts == {'0.0': 1}
+    assert all(count > 0 for count in summary.target_counts.values())
+    # Удалена граничная запись: неточные min/max допустимы, остальное совпадает
+    assert [m for m in summary.diff(rebuilt) if not m.startswith('bounds:')] == []
+
+
+def test_target_column_added_in_later_batch_counts_earlier_rows_as_missing():
+    stored = [{'employee_id': str(i), 'возраст': 30 + i} for i in range(48)]
+    summary = DatasetSummary.from_dataframe(pd.DataFrame(stored))
+
+    summary.add_records([{'employee_id': 'new', 'возраст': 25, TARGET_COLUMN: 1}])
+
+    rebuilt = DatasetSummary.from_dataframe(pd.DataFrame(
+        stored + [{'employee_id': 'new', 'возраст': 25, TARGET_COLUMN: 1}]
+    ))
+    assert summary.target_missing == rebuilt.target_missing == 48
+    assert summary.info()['target_distribution'] == {1.0: 1}
+    assert summary.diff(rebuilt) == []
+
+
+def test_legacy_keys_are_merged_on_load():
+    summary = DatasetSummary.from_dict({'target_counts': {'1': 2, '1.0': 3, '0': 1}})
+    assert summary.target_counts == {'1.0': 5, '0.0': 1}
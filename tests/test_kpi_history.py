@@ -0,0 +1,52 @@
+# test_kpi_history.py
+import numpy as np
+
+from config import ID_COLUMN
+from employee_store import EmployeeStore
+from kpi_history import KPIHistory
+
+
+def _replay(matrix, window):
+    history = KPIHistory(len(matrix), window)
+    for month_values in matrix.T:
+        history.add_month(month_values)
+    return history
+
+
+def _assert_features_equal(left, right):
+    for feature, values in left.features().items():
+        np.testing.assert_allclose(values, right.features()[feature], equal_nan=True)
+
+
+def test_month_added_to_restored_state_matches_full_replay():
+    rng = np.random.default_rng(0)
+    matrix = rng.uniform(0.5, 1.2, size=(6, 8))
+    matrix[rng.random(matrix.shape) < 0.2] = np.nan
+
+    for window in (None, 3):
+        history = _replay(matrix[:, :1], window)
+        for month in range(1, matrix.shape[1]):
+            history = KPIHistory.from_states(history.to_states(), window)
+            history.add_month(matrix[:, month])
+        _assert_features_equal(history, _replay(matrix, window))
+
+
+def test_store_adds_month_from_persisted_state(tmp_path):
+    records = [
+        {ID_COLUMN: 'a', 'KPI_июнь': 0.9, 'KPI_июль': 0.0, 'KPI_август': 1.1},
+        {ID_COLUMN: 'b', 'KPI_июнь': 0.7, 'KPI_июль': 0.8, 'KPI_август': 0.6},
+    ]
+    with EmployeeStore(tmp_path / 'employees.sqlite') as store:
+        store.replace_all(records)
+        store.add_kpi_month('сентябрь', {'a': 1.0, 'b': 'нет'})
+        updated, _ = store.add_kpi_month('октябрь', {'a': 0.95, 'b': 0.9})
+        state = store.conn.execute("SELECT kpi_state FROM employees WHERE key = 'a'").fetchone()[0]
+
+    # 0 и 'нет' - нет данных за месяц, как в DataProcessor
+    expected = _replay(np.array([[0.9, np.nan, 1.1, 1.0, 0.95],
+                                 [0.7, 0.8, 0.6, np.nan, 0.9]]), None).features()
+    assert state is not None
+    assert [record['KPI_сентябрь'] for record in updated] == [1.0, 0.0]
+    for feature, values in expected.items():
+        np.testing.assert_allclose([record[feature] for record in updated],
+                                   np.nan_to_num(values))
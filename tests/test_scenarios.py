@@ -0,0 +1,55 @@
+# test_scenarios.py
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from json_predictor import JSONPredictor
+
+MONTHS = ['июнь', 'июль', 'август', 'сентябрь', 'октябрь']
+FEATURES = [f'KPI_{month}' for month in MONTHS] + [
+    'KPI_мин', 'KPI_макс', 'KPI_размах', 'KPI_тренд', 'KPI_последний', 'возраст'
+]
+
+
+class RecordingModel:
+    """Модель, запоминающая оцененные (масштабированные) признаки"""
+
+    def __init__(self, model):
+        self.model = model
+        self.scored = None
+
+    def predict_proba(self, X):
+        self.scored = np.asarray(X)
+        return self.model.predict_proba(X)
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+
+def _predictor(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0.5, 1.2, size=(40, len(FEATURES)))
+    y = (X[:, 0] > 0.85).astype(int)
+    scaler = StandardScaler().fit(X)
+    model_path = tmp_path / 'model.pkl'
+    joblib.dump({'model': LogisticRegression().fit(scaler.transform(X), y),
+                 'scaler': scaler, 'feature_names': FEATURES}, model_path)
+
+    predictor = JSONPredictor(str(model_path))
+    predictor.model = RecordingModel(predictor.model)
+    return predictor
+
+
+def test_single_kpi_month_scenario_recomputes_kpi_statistics(tmp_path):
+    predictor = _predictor(tmp_path)
+    employee = dict(zip(MONTHS, [0.85, 0.78, 0.92, 0.88, 0.79]), возраст=28)
+
+    predictor.score_scenarios(employee, {'KPI_октябрь': [0.79, 1.3]})
+    scored = predictor.model.scored[1:]
+
+    # Масштабирование аффинно: изменение признака видно и после него
+    changed = {feature for i, feature in enumerate(FEATURES) if scored[0, i] != scored[1, i]}
+    assert changed == {'KPI_октябрь', 'KPI_макс', 'KPI_размах', 'KPI_тренд', 'KPI_последний'}
+    # Сценарий с исходным значением совпадает с базовой оценкой
+    np.testing.assert_allclose(scored[0], predictor.model.scored[0])
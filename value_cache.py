@@ -0,0 +1,57 @@
+# value_cache.py
+from collections import OrderedDict
+
+class ValueCache:
+    """Мемоизация разбора строковых значений с ограниченным размером (LRU).
+
+    Поля вроде стажа, дат отпуска, статусов и городов сильно повторяются,
+    поэтому каждое уникальное значение разбирается один раз; кэш живет
+    между батчами и шардами, вытесняя давно не встречавшиеся значения.
+    """
+
+    def __init__(self, parser, max_size=4096):
+        self.parser = parser
+        self.max_size = max_size
+        self._values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(value):
+        # NaN != NaN, поэтому все пропуски сводятся к одному ключу;
+        # тип в ключе различает 1, 1.0 и True
+        if value is None or value != value:
+            return None
+        return (value.__class__, value)
+
+    def __call__(self, value):
+        key = self._key(value)
+        try:
+            result = self._values[key]
+        except KeyError:
+            pass
+        else:
+            self._values.move_to_end(key)
+            self.hits += 1
+            return result
+
+        result = self.parser(value)
+        self.misses += 1
+        self._values[key] = result
+        if len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+        return result
+
+    def map_unique(self, values, dtype=None):
+        """Словарное кодирование столбца: разбор уникальных значений и
+        растягивание результата обратно по кодам"""
+        import numpy as np
+        import pandas as pd
+
+        values = pd.Series(values)
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        parsed = np.asarray([self(value) for value in uniques], dtype=dtype)
+        return pd.Series(parsed[codes], index=values.index)
+
+    def stats(self):
+        return {'size': len(self._values), 'hits': self.hits, 'misses': self.misses}